@@ -0,0 +1,153 @@
+import asyncio
+import httpx
+import json
+import random
+import time
+import uuid
+
+class FakeXAPI:
+    """POST /2/tweets and /2/oauth2/token with latency, 401/429 injection and rate-limit headers"""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, unauthorized_rate: float = 0.0,
+                 rate_limited_rate: float = 0.0, window_limit: int = 100_000, window_seconds: int = 900):
+        self.latency = latency
+        self.jitter = jitter
+        self.unauthorized_rate = unauthorized_rate
+        self.rate_limited_rate = rate_limited_rate
+        self.window_limit = window_limit
+        self.window_seconds = window_seconds
+        self.valid_tokens = set()
+        self.tweets = []
+        self.refreshes = 0
+        self._window_start = time.time()
+        self._window_used = 0
+
+    def issue_tokens(self) -> dict:
+        """New access/refresh token pair that the fake accepts"""
+        access_token = uuid.uuid4().hex
+        self.valid_tokens.add(access_token)
+        return {
+            "token_type": "bearer",
+            "access_token": access_token,
+            "refresh_token": uuid.uuid4().hex,
+            "expires_in": 7200,
+            "scope": "tweet.read tweet.write users.read media.write offline.access",
+        }
+
+    def _rate_limit_headers(self) -> dict:
+        now = time.time()
+        if now - self._window_start >= self.window_seconds:
+            self._window_start, self._window_used = now, 0
+        reset = int(self._window_start + self.window_seconds)
+        return {
+            "x-rate-limit-limit": str(self.window_limit),
+            "x-rate-limit-remaining": str(max(self.window_limit - self._window_used, 0)),
+            "x-rate-limit-reset": str(reset),
+        }
+
+    async def _sleep(self):
+        await asyncio.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        await self._sleep()
+        if request.url.path == "/2/oauth2/token":
+            self.refreshes += 1
+            return httpx.Response(200, json=self.issue_tokens())
+
+        if request.url.path != "/2/tweets":
+            return httpx.Response(404, json={"title": "Not Found"})
+
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if token not in self.valid_tokens or random.random() < self.unauthorized_rate:
+            self.valid_tokens.discard(token)
+            return httpx.Response(401, json={"title": "Unauthorized", "status": 401})
+
+        headers = self._rate_limit_headers()
+        if self._window_used >= self.window_limit or random.random() < self.rate_limited_rate:
+            # Short reset so injected 429s pause workers briefly instead of for a whole window
+            headers["x-rate-limit-remaining"] = "0"
+            headers["x-rate-limit-reset"] = str(int(time.time()) + 1)
+            return httpx.Response(429, json={"title": "Too Many Requests"}, headers=headers)
+
+        self._window_used += 1
+        headers["x-rate-limit-remaining"] = str(self.window_limit - self._window_used)
+        tweet_id = str(1_800_000_000_000_000_000 + len(self.tweets))
+        self.tweets.append(json.loads(request.content)["text"])
+        return httpx.Response(201, json={"data": {"id": tweet_id, "text": self.tweets[-1]}}, headers=headers)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+SAMPLE_TWEETS = [
+    "Swapped the drip emitters on rack three and the basil noticed before I did.",
+    "Nutrient film running smooth today. Nothing to report, which is the best report.",
+    "Root zone temps holding steady. Quiet greenhouse days are underrated.",
+    "Every tomato on the south rack came in within a gram of each other. I don't trust it.",
+]
+
+class FakeAnthropic:
+    """Messages API that streams text deltas with a time-to-first-token and per-token delay"""
+
+    def __init__(self, first_token_latency: float = 0.3, token_latency: float = 0.01, chars_per_token: int = 4):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.chars_per_token = chars_per_token
+        self.requests = 0
+
+    @staticmethod
+    def _usage(output_tokens: int) -> dict:
+        return {
+            "input_tokens": 12,
+            "output_tokens": output_tokens,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 1800,
+        }
+
+    def _message(self, text: str) -> dict:
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": "fake",
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": self._usage(len(text) // self.chars_per_token),
+        }
+
+    @staticmethod
+    def _event(name: str, data: dict) -> bytes:
+        return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n".encode()
+
+    async def _stream(self, text: str):
+        message = self._message("")
+        message["usage"] = self._usage(1)
+        yield self._event("message_start", {"message": message})
+        yield self._event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        await asyncio.sleep(self.first_token_latency)
+        for i in range(0, len(text), self.chars_per_token):
+            yield self._event("content_block_delta", {
+                "index": 0,
+                "delta": {"type": "text_delta", "text": text[i:i + self.chars_per_token]},
+            })
+            await asyncio.sleep(self.token_latency)
+        yield self._event("content_block_stop", {"index": 0})
+        yield self._event("message_delta", {
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(text) // self.chars_per_token},
+        })
+        yield self._event("message_stop", {})
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        body = json.loads(request.content)
+        if body.get("stream"):
+            text = random.choice(SAMPLE_TWEETS)
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self._stream(text))
+
+        # Batch requests ask for a JSON array of drafts
+        await asyncio.sleep(self.first_token_latency + self.token_latency * body.get("max_tokens", 100) / 4)
+        return httpx.Response(200, json=self._message(json.dumps(SAMPLE_TWEETS)))
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
@@ -0,0 +1,79 @@
+from collections import defaultdict, deque
+import asyncio
+import httpx
+import json
+import time
+
+# Headers worth keeping; anything carrying credentials is never written
+RECORDED_HEADERS = {"content-type", "retry-after"}
+RECORDED_HEADER_PREFIXES = ("x-rate-limit-", "x-user-limit-", "x-app-limit-")
+
+def _is_stream(request: httpx.Request) -> bool:
+    """Whether a JSON request asked for a streamed response; streamed and plain calls share a path"""
+    try:
+        return bool(json.loads(request.content).get("stream"))
+    except (ValueError, AttributeError):
+        return False
+
+def _keep_header(name: str) -> bool:
+    name = name.lower()
+    return name in RECORDED_HEADERS or name.startswith(RECORDED_HEADER_PREFIXES)
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport and appends each exchange to a JSONL file
+
+    Works in front of the fakes or the real APIs, so a session against
+    production latencies can be replayed offline.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, path: str, service: str):
+        self.inner = inner
+        self.path = path
+        self.service = service
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        body = await response.aread()
+        record = {
+            "service": self.service,
+            "method": request.method,
+            "path": request.url.path,
+            "stream": _is_stream(request),
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if _keep_header(k)},
+            "body": body.decode("utf-8", errors="replace"),
+            "latency": time.perf_counter() - started,
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        # The body is already decoded, so drop headers describing the wire encoding
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=body)
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded responses in order per (method, path, stream), cycling when exhausted
+
+    Recorded latency is reproduced, scaled by speed. Tokens in the replayed
+    requests aren't checked; the recorded status decides the outcome.
+    """
+
+    def __init__(self, path: str, service: str, speed: float = 1.0):
+        self.speed = speed
+        self._records = defaultdict(list)
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record["service"] == service:
+                    self._records[(record["method"], record["path"], record.get("stream", False))].append(record)
+        self._queues = {key: deque(records) for key, records in self._records.items()}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = (request.method, request.url.path, _is_stream(request))
+        if key not in self._records:
+            return httpx.Response(404, json={"title": f"No recording for {request.method} {request.url.path}"})
+        if not self._queues[key]:
+            self._queues[key].extend(self._records[key])
+        record = self._queues[key].popleft()
+        await asyncio.sleep(record["latency"] / self.speed)
+        return httpx.Response(record["status"], headers=record["headers"], content=record["body"].encode("utf-8"))
@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import uuid
+
+# Settings are read on first import of src, so configure the benchmark environment first
+BENCH_ENV = {
+    "CLIENT_ID": "bench-client",
+    "CLIENT_SECRET": "bench-secret",
+    "REDIRECT_URI": "http://localhost/callback",
+    "ANTHROPIC_API_KEY": "bench-key",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "LOG_LEVEL": "ERROR",
+    "SCHEDULER_JOBSTORE": "memory",
+    "LEADER_ELECTION_ENABLED": "false",
+    "WORKER_EMBEDDED": "false",
+    "POSTING_WINDOW_START_HOUR": "0",
+    "POSTING_WINDOW_END_HOUR": "23",
+    "DAILY_POST_QUOTA": "1000000",
+    "MONTHLY_POST_QUOTA": "100000000",
+    "CLIENT_BUCKET_CAPACITY": "1000000",
+    "ADMISSION_MAX_CONCURRENT": "64",
+    "ADMISSION_MAX_QUEUE": "1024",
+    "POST_COALESCE_WINDOW": "0",
+}
+
+SCENARIOS = ["post_tweet", "health", "scheduler_tick", "token_refresh", "generate", "outbox_end_to_end"]
+
+def percentile(ordered: list, p: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    index = min(math.ceil(p / 100 * len(ordered)) - 1, len(ordered) - 1)
+    return ordered[max(index, 0)]
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+    }
+
+async def run_concurrent(op, total: int, concurrency: int) -> dict:
+    """Run op(i) total times across concurrency lanes, timing each successful call"""
+    latencies = []
+    errors = 0
+    indexes = iter(range(total))
+
+    async def lane():
+        nonlocal errors
+        for i in indexes:
+            started = time.perf_counter()
+            try:
+                await op(i)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(lane() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+def install_upstreams(args):
+    """Point the shared clients at the fakes (or a replay) and Redis at fakeredis unless a URL was given"""
+    import httpx
+    from anthropic import AsyncAnthropic
+    from benchmarks.fakes import FakeAnthropic, FakeXAPI
+    from benchmarks.recorder import RecordingTransport, ReplayTransport
+    import src.utils.anthropic_client as anthropic_client
+    import src.utils.async_redis_handler as async_redis_handler
+    import src.utils.http_client as http_client
+
+    fake_x = FakeXAPI(
+        latency=args.x_latency,
+        unauthorized_rate=args.x_401_rate,
+        rate_limited_rate=args.x_429_rate
+    )
+    fake_anthropic = FakeAnthropic(first_token_latency=args.anthropic_ttft, token_latency=args.anthropic_token_latency)
+
+    if args.replay:
+        x_transport = ReplayTransport(args.replay, "x_api", speed=args.replay_speed)
+        anthropic_transport = ReplayTransport(args.replay, "anthropic", speed=args.replay_speed)
+    else:
+        x_transport = fake_x.transport()
+        anthropic_transport = fake_anthropic.transport()
+    if args.record:
+        x_transport = RecordingTransport(x_transport, args.record, "x_api")
+        anthropic_transport = RecordingTransport(anthropic_transport, args.record, "anthropic")
+
+    http_client._client = httpx.AsyncClient(transport=x_transport)
+    anthropic_client._client = AsyncAnthropic(
+        api_key="bench-key",
+        http_client=httpx.AsyncClient(transport=anthropic_transport),
+        max_retries=0
+    )
+
+    if not args.redis_url:
+        import fakeredis
+        async_redis_handler._handler = async_redis_handler.AsyncRedisHandler(fakeredis.FakeAsyncRedis())
+    return fake_x
+
+async def seed_tokens(fake_x):
+    from src.utils.async_redis_handler import get_async_redis_handler
+    from src.bot.token_manager import get_token_manager
+
+    await get_async_redis_handler().store_twitter_tokens("bot_user", fake_x.issue_tokens())
+    get_token_manager().invalidate()
+
+async def bench_post_tweet(args, client) -> dict:
+    async def op(i):
+        response = await client.post("/post-tweet", headers={"Idempotency-Key": uuid.uuid4().hex})
+        if response.status_code != 202:
+            raise Exception(f"HTTP {response.status_code}")
+    return await run_concurrent(op, args.requests, args.concurrency)
+
+async def bench_health(args, client) -> dict:
+    from src.utils.health import get_health_monitor
+
+    await get_health_monitor().refresh()
+
+    async def op(i):
+        response = await client.get("/health" if i % 2 else "/livez")
+        if response.status_code != 200:
+            raise Exception(f"HTTP {response.status_code}")
+    return await run_concurrent(op, args.requests, args.concurrency)
+
+async def bench_scheduler_tick(args, client) -> dict:
+    from datetime import datetime, timedelta, timezone
+    from src.utils.scheduler import get_scheduler
+
+    started = datetime.now(timezone.utc)
+
+    async def op(i):
+        # A distinct slot per tick, so each one queues its own job
+        await get_scheduler().post_scheduled_tweet(slot=(started + timedelta(microseconds=i)).isoformat())
+    return await run_concurrent(op, args.requests, args.concurrency)
+
+async def bench_token_refresh(args, client) -> dict:
+    from src.bot.token_manager import get_token_manager
+
+    manager = get_token_manager()
+
+    async def op(i):
+        tokens = await manager.get_tokens()
+        # Concurrent callers holding the same stale token share one refresh
+        await manager.refresh(stale_access_token=tokens["access_token"])
+    return await run_concurrent(op, args.requests, args.concurrency)
+
+async def bench_generate(args, client) -> dict:
+    from src.bot.content_generator import ContentGenerator
+
+    generator = ContentGenerator()
+
+    async def op(i):
+        await generator.generate_tweet()
+    return await run_concurrent(op, max(args.requests // 10, 1), args.concurrency)
+
+async def bench_outbox_end_to_end(args, client) -> dict:
+    """Submit jobs, drain them with a worker, and time submit-to-posted from the job records"""
+    from datetime import datetime
+    from src.utils.async_redis_handler import OUTBOX_STREAM
+    from src.utils.outbox import get_tweet_outbox, POSTED, FAILED
+    from src.worker import OutboxWorker
+
+    outbox = get_tweet_outbox()
+    # Start from an empty stream so jobs queued by earlier scenarios aren't in the timing
+    await outbox.redis_handler.redis_client.delete(OUTBOX_STREAM)
+    total = max(args.requests // 5, 1)
+    jobs = [await outbox.submit() for _ in range(total)]
+
+    worker = OutboxWorker(outbox, concurrency=args.worker_concurrency)
+    started = time.perf_counter()
+    worker.start()
+    deadline = started + args.drain_timeout
+    while time.perf_counter() < deadline:
+        settled = [await outbox.get_job(job["id"]) for job in jobs]
+        if all(job["status"] in (POSTED, FAILED) for job in settled):
+            break
+        await asyncio.sleep(0.05)
+    await worker.stop()
+
+    latencies = []
+    errors = 0
+    for job in settled:
+        if job["status"] != POSTED:
+            errors += 1
+            continue
+        latencies.append((datetime.fromisoformat(job["updated_at"]) - datetime.fromisoformat(job["created_at"])).total_seconds())
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+BENCHES = {
+    "post_tweet": bench_post_tweet,
+    "health": bench_health,
+    "scheduler_tick": bench_scheduler_tick,
+    "token_refresh": bench_token_refresh,
+    "generate": bench_generate,
+    "outbox_end_to_end": bench_outbox_end_to_end,
+}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions beyond tolerance in p95/p99 latency or throughput"""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {current[metric]} > baseline {base[metric]} (+{tolerance:.0%})")
+        if base["throughput"] and current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['throughput']} < baseline {base['throughput']} (-{tolerance:.0%})")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {current['errors']} > baseline {base['errors']}")
+    return regressions
+
+def print_table(results: dict):
+    print(f"{'scenario':<20}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}")
+    for name, r in results["scenarios"].items():
+        print(f"{name:<20}{r['count']:>8}{r['errors']:>8}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['throughput']:>10}")
+
+async def run(args) -> dict:
+    import httpx
+
+    fake_x = install_upstreams(args)
+    import src.main as main
+
+    await seed_tokens(fake_x)
+    results = {"config": {k: v for k, v in vars(args).items() if k not in ("baseline", "output", "update_baseline")}, "scenarios": {}}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name in args.scenarios:
+            results["scenarios"][name] = await BENCHES[name](args, client)
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against local stand-ins for X, Anthropic and Redis")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=500, help="Operations per scenario (fewer for generation and the outbox)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--worker-concurrency", type=int, default=4)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--x-latency", type=float, default=0.05)
+    parser.add_argument("--x-401-rate", type=float, default=0.0, help="Share of tweet posts rejected with 401")
+    parser.add_argument("--x-429-rate", type=float, default=0.0, help="Share of tweet posts rejected with 429")
+    parser.add_argument("--anthropic-ttft", type=float, default=0.2, help="Seconds to the first streamed token")
+    parser.add_argument("--anthropic-token-latency", type=float, default=0.005)
+    parser.add_argument("--redis-url", help="Use a real Redis (a scratch database - it is written to) instead of fakeredis")
+    parser.add_argument("--record", help="Append every upstream exchange to this JSONL file")
+    parser.add_argument("--replay", help="Serve upstream responses from a recording instead of the fakes")
+    parser.add_argument("--replay-speed", type=float, default=1.0)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Fail if results regress against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to --baseline instead of comparing")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,7 +24,7 @@ logger = logging.getLogger(__name__)
 # OAuth 2.0 Configuration
 auth_url = "https://twitter.com/i/oauth2/authorize"
 token_url = "https://api.x.com/2/oauth2/token"
-scopes = ["tweet.read", "users.read", "tweet.write", "offline.access"]
+scopes = ["tweet.read", "users.read", "tweet.write", "media.write", "offline.access"]
 
 # PKCE Setup
 code_verifier = base64.urlsafe_b64encode(os.urandom(30)).decode("utf-8")
@@ -1,19 +1,39 @@
-from anthropic import Anthropic
 from src.config.settings import get_settings
+from src.utils.anthropic_client import get_anthropic_client
+from src.utils.usage_tracker import get_usage_tracker
+from src.utils.hedging import LatencyTracker, hedged
+from src.utils.resilience import call_with_resilience
+from src.utils.metrics import ANTHROPIC_LATENCY
+from src.utils.structured_logging import log_payload
 import logging
-import httpx
+import json
+import math
+import re
 
 logger = logging.getLogger(__name__)
 
+# Conservative average for English tweet text
+CHARS_PER_TOKEN = 3
+
+# Models that accept cache_control, by name prefix, and the shortest prompt each will cache
+PROMPT_CACHE_MIN_TOKENS = {
+   "claude-3-opus": 1024,
+   "claude-3-haiku": 2048,
+   "claude-3-5-sonnet": 1024,
+   "claude-3-5-haiku": 2048,
+   "claude-3-7-sonnet": 1024,
+   "claude-sonnet-4": 1024,
+   "claude-opus-4": 1024,
+}
+# Typical average for English prose; only used to estimate prompt length
+PROMPT_CHARS_PER_TOKEN = 4
+
+# Recent generate_tweet latencies, shared by all generators in the process
+_latency_tracker = LatencyTracker()
+
 class ContentGenerator:
    def __init__(self):
        self.settings = get_settings()
-       # Create a custom HTTP client with no proxy
-       http_client = httpx.Client(proxies=None)
-       self.client = Anthropic(
-           api_key=self.settings.ANTHROPIC_API_KEY,
-           http_client=http_client
-       )
        self.system = """You're @CityFarmersBot, an urban farming tech enthusiast running experimental greenhouse systems.
 
 PERSONALITY & VOICE:
@@ -45,6 +65,71 @@ AREAS OF PASSION & EXPERTISE:
 - Deep technical knowledge that shows up naturally in your posts
 
 Keep tweets under 280 characters. Don't try to structure them or make them educational. No emojis, hashtags, or engagement hooks. These are just your actual thoughts as they occur."""
+       self.cache_inactive_reason = self._cache_inactive_reason(self.system)
+       self.cache_system = self.cache_inactive_reason is None
+       if not self.cache_system:
+           logger.info(f"Persona sent uncached: {self.cache_inactive_reason}")
+
+   @property
+   def client(self):
+       """Shared async client - one connection pool per process"""
+       return get_anthropic_client()
+
+   def _cache_inactive_reason(self, text: str) -> str | None:
+       """Why the model wouldn't cache text as a prompt prefix, or None if it would
+
+       Below a model's minimum length, or on a model without prompt caching,
+       cache_control is silently ignored; sending it then only adds a beta header.
+       """
+       if not self.settings.ANTHROPIC_PROMPT_CACHING:
+           return "ANTHROPIC_PROMPT_CACHING is off"
+       model = self.settings.ANTHROPIC_MODEL
+       min_tokens = next((n for prefix, n in PROMPT_CACHE_MIN_TOKENS.items() if model.startswith(prefix)), None)
+       if min_tokens is None:
+           return f"{model} doesn't support prompt caching"
+       if len(text) / PROMPT_CHARS_PER_TOKEN < min_tokens:
+           return f"persona is under {model}'s {min_tokens}-token caching minimum"
+       return None
+
+   def _request_params(self, prompt: str, max_tokens: int) -> dict:
+       """Request parameters shared by plain and streaming generation"""
+       if self.cache_system:
+           # Mark the persona as a cacheable prefix so repeat calls read it from cache
+           system = [{
+               "type": "text",
+               "text": self.system,
+               "cache_control": {"type": "ephemeral"}
+           }]
+           extra_headers = {"anthropic-beta": "prompt-caching-2024-07-31"}
+       else:
+           system = self.system
+           extra_headers = None
+       
+       return {
+           "model": self.settings.ANTHROPIC_MODEL,
+           "max_tokens": max_tokens,
+           "temperature": 0.75,
+           "system": system,
+           "messages": [{
+               "role": "user",
+               "content": prompt
+           }],
+           "extra_headers": extra_headers
+       }
+
+   async def _create_message(self, prompt: str, max_tokens: int):
+       """Send a prompt with the persona system prompt and record token usage"""
+       with ANTHROPIC_LATENCY.labels("create").time():
+           message = await call_with_resilience(
+               "anthropic", self.client.messages.create, **self._request_params(prompt, max_tokens)
+           )
+       await get_usage_tracker().record(message.usage)
+       return message
+
+   @staticmethod
+   def _max_tokens_for(limit: int) -> int:
+       """Output token budget for a character limit, with headroom for prefixes and word boundaries"""
+       return math.ceil(limit / CHARS_PER_TOKEN * 1.5) + 16
 
    def _clean_tweet(self, content: str) -> str:
        """Remove any AI-typical prefixes and formatting"""
@@ -74,7 +159,8 @@ Keep tweets under 280 characters. Don't try to structure them or make them educa
        if len(tweet) <= limit:
            return tweet
            
-       truncated = tweet[:limit]
+       # Leave room for the ellipsis
+       truncated = tweet[:limit - 3]
        last_space = truncated.rfind(' ')
        if last_space > 0:
            truncated = truncated[:last_space]
@@ -85,6 +171,53 @@ Keep tweets under 280 characters. Don't try to structure them or make them educa
            
        return truncated
 
+   async def _generate_streaming(self, prompt: str, limit: int = 280) -> str:
+       """Stream a completion and stop as soon as a complete tweet is available
+
+       Cleaning runs on every delta. The stream is cancelled once the model
+       starts a second paragraph (the tweet is complete) or the cleaned text
+       passes the limit (anything further would be truncated away).
+       """
+       text = ""
+       streamed = 0
+       usage = None
+       output_tokens = None
+       stopped_early = False
+       async with self.client.messages.stream(
+           **self._request_params(prompt, self._max_tokens_for(limit))
+       ) as stream:
+           # Raw events rather than text_stream: the SDK's message snapshot never picks
+           # up message_delta's output token count, only message_start's placeholder
+           async for event in stream:
+               if event.type == "message_start":
+                   usage = event.message.usage
+               elif event.type == "message_delta":
+                   output_tokens = event.usage.output_tokens
+               elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                   text += event.delta.text
+                   streamed += len(event.delta.text)
+                   tweet = self._clean_tweet(text.strip())
+                   if "\n\n" in tweet:
+                       text = tweet.split("\n\n", 1)[0]
+                       stopped_early = True
+                       break
+                   if len(tweet) > limit:
+                       stopped_early = True
+                       break
+       
+       if usage is not None:
+           # A cancelled stream never gets its message_delta; estimate from the text received
+           estimated = output_tokens is None
+           if estimated:
+               output_tokens = math.ceil(streamed / CHARS_PER_TOKEN)
+           await get_usage_tracker().record(
+               usage.model_copy(update={"output_tokens": output_tokens}), estimated=estimated
+           )
+       
+       if stopped_early:
+           logger.info("Stopped generation stream early at tweet boundary")
+       return text.strip()
+
    async def generate_tweet(self) -> str:
        """Generate a tweet from our tech farmer personality"""
        try:
@@ -93,18 +226,12 @@ Keep tweets under 280 characters. Don't try to structure them or make them educa
            # Simple prompt that lets Claude embody the character
            prompt = "Share what's on your mind right now as a tweet."
            
-           message = self.client.messages.create(
-               model="claude-3-sonnet-20240229",
-               max_tokens=1024,
-               temperature=0.75,
-               system=self.system,
-               messages=[{
-                   "role": "user",
-                   "content": prompt
-               }]
-           )
-           
-           tweet = message.content[0].text.strip()
+           if self.settings.ANTHROPIC_STREAMING:
+               with ANTHROPIC_LATENCY.labels("stream").time():
+                   tweet = await call_with_resilience("anthropic", self._generate_streaming, prompt)
+           else:
+               message = await self._create_message(prompt, max_tokens=self._max_tokens_for(280))
+               tweet = message.content[0].text.strip()
            
            # Clean any AI-typical formatting
            tweet = self._clean_tweet(tweet)
@@ -115,10 +242,63 @@ Keep tweets under 280 characters. Don't try to structure them or make them educa
                tweet = self._truncate_to_limit(tweet)
            
            logger.info(f"Generated tweet length: {len(tweet)} chars")
-           logger.info(f"Final tweet content: {tweet}")
+           log_payload(logger, "generated_tweet", "Final tweet content: %s", tweet)
            
            return tweet
            
        except Exception as e:
            logger.error(f"Failed to generate content: {str(e)}")
-           raise
\ No newline at end of file
+           raise
+
+   async def generate_tweet_hedged(self) -> str:
+       """Generate a tweet, racing a second request if the first is slower than usual"""
+       settings = self.settings
+       hedge_delay = _latency_tracker.percentile(settings.HEDGE_PERCENTILE)
+       if hedge_delay is None:
+           hedge_delay = settings.HEDGE_DEFAULT_DELAY
+       return await hedged(self.generate_tweet, hedge_delay, tracker=_latency_tracker)
+
+   def _parse_batch(self, text: str) -> list:
+       """Parse a JSON array of tweets, falling back to one tweet per paragraph"""
+       start, end = text.find('['), text.rfind(']')
+       if start != -1 and end > start:
+           try:
+               drafts = json.loads(text[start:end + 1])
+               if isinstance(drafts, list):
+                   return [d for d in drafts if isinstance(d, str)]
+           except json.JSONDecodeError as e:
+               logger.warning(f"Batch response was not valid JSON: {e}")
+
+       # Fallback: paragraphs, stripping list numbering
+       paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+       return [re.sub(r'^(\d+[.)]|[-*])\s+', '', p) for p in paragraphs]
+
+   async def generate_batch(self, n: int) -> list:
+       """Generate up to n independent tweets from a single request"""
+       try:
+           logger.info(f"Generating batch of {n} tweets...")
+           
+           prompt = (
+               f"Share {n} different things on your mind right now, each as a separate tweet. "
+               f"Respond with only a JSON array of {n} strings, one tweet per string."
+           )
+           
+           message = await self._create_message(prompt, max_tokens=min(200 * n + 100, 4096))
+           
+           tweets = []
+           for draft in self._parse_batch(message.content[0].text):
+               tweet = self._clean_tweet(draft.strip())
+               if len(tweet) > 280:
+                   tweet = self._truncate_to_limit(tweet)
+               if tweet and tweet not in tweets:
+                   tweets.append(tweet)
+           
+           if len(tweets) < n:
+               logger.warning(f"Batch returned {len(tweets)} usable tweets, expected {n}")
+           logger.info(f"Generated {len(tweets[:n])} tweets in one request")
+           
+           return tweets[:n]
+           
+       except Exception as e:
+           logger.error(f"Failed to generate batch: {str(e)}")
+           raise
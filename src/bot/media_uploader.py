@@ -0,0 +1,232 @@
+from src.config.settings import get_settings
+from src.utils.http_client import x_api_get, x_api_post
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.bot.token_manager import MissingTokensError, get_token_manager
+from src.utils.rate_limiter import RateLimited, get_rate_limit_tracker
+from pathlib import Path
+import asyncio
+import hashlib
+import logging
+import math
+import mimetypes
+import mmap
+import time
+
+logger = logging.getLogger(__name__)
+
+MEDIA_UPLOAD_URL = "https://api.x.com/2/media/upload"
+
+# X keeps uploaded media for 24 hours unless INIT/FINALIZE say otherwise
+DEFAULT_MEDIA_EXPIRY = 24 * 60 * 60
+# Stop reusing a cached media id this long before X expires it
+MEDIA_EXPIRY_MARGIN = 60 * 60
+
+# X allows up to 4 images (or one GIF/video) per tweet
+MAX_ATTACHMENTS = 4
+
+class MediaUploadError(Exception):
+    """Raised when X rejects an upload; the upload can't be resumed"""
+
+    def __init__(self, message: str, status_code: int = None):
+        self.status_code = status_code
+        super().__init__(message)
+
+class MediaUploader:
+    """Chunked uploads to the X media endpoint (INIT, APPEND, FINALIZE, STATUS)
+
+    Files are read through mmap one chunk at a time in a worker thread, so a
+    video is never loaded whole and disk reads stay off the event loop. At
+    most MEDIA_UPLOAD_CONCURRENCY APPENDs are in flight across all uploads.
+    Progress is kept in Redis under the file's SHA-256: an upload interrupted
+    by a crash or a failed chunk resumes with the segments still missing, and
+    a finalized media id is reused for the same file until X expires it.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self.token_manager = get_token_manager()
+        self.rate_limiter = get_rate_limit_tracker()
+        self._appends = asyncio.Semaphore(self.settings.MEDIA_UPLOAD_CONCURRENCY)
+
+    def resolve(self, attachment: str) -> Path:
+        """Path of an attachment inside MEDIA_DIR; anything outside it is rejected"""
+        media_dir = Path(self.settings.MEDIA_DIR).resolve()
+        path = (media_dir / attachment).resolve()
+        if not path.is_relative_to(media_dir) or not path.is_file():
+            raise ValueError(f"Attachment not found in media directory: {attachment}")
+        return path
+
+    @staticmethod
+    def _category(media_type: str) -> str:
+        if media_type == "image/gif":
+            return "tweet_gif"
+        if media_type.startswith("video/"):
+            return "tweet_video"
+        return "tweet_image"
+
+    @staticmethod
+    def _digest(path: Path) -> str:
+        """SHA-256 of a file, hashed straight from the mapping without copying it"""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+    @staticmethod
+    def _data(response) -> dict:
+        body = response.json() if response.content else {}
+        return body.get("data", body)
+
+    async def _send(self, method: str, **kwargs):
+        """Call the media endpoint as the bot account, refreshing an expired token once"""
+        tokens = await self.token_manager.get_valid_tokens()
+        if not tokens:
+            raise MissingTokensError()
+
+        send = x_api_post if method == "POST" else x_api_get
+        for attempt in range(self.settings.TOKEN_REFRESH_MAX_RETRIES + 1):
+            headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+            response = await send(MEDIA_UPLOAD_URL, headers=headers, **kwargs)
+
+            if response.status_code == 429:
+                raise await self.rate_limiter.error_from_response("media", response)
+            await self.rate_limiter.record("media", response.headers)
+
+            if (response.status_code == 401 and 'refresh_token' in tokens
+                    and attempt < self.settings.TOKEN_REFRESH_MAX_RETRIES):
+                tokens = await self.token_manager.refresh(stale_access_token=tokens['access_token'])
+                continue
+            break
+
+        if response.status_code >= 400:
+            raise MediaUploadError(
+                f"Media upload failed ({response.status_code}): {response.text}",
+                status_code=response.status_code
+            )
+        return response
+
+    async def _init(self, size: int, media_type: str, category: str) -> tuple[str, int]:
+        data = self._data(await self._send("POST", data={
+            "command": "INIT",
+            "total_bytes": str(size),
+            "media_type": media_type,
+            "media_category": category,
+        }))
+        media_id = data.get("id") or data.get("media_id_string")
+        expires_at = int(time.time()) + int(data.get("expires_after_secs") or DEFAULT_MEDIA_EXPIRY)
+        return media_id, expires_at
+
+    async def _append(self, mm: mmap.mmap, media_key: str, media_id: str, index: int, expires_at: int):
+        chunk_size = self.settings.MEDIA_CHUNK_SIZE
+        async with self._appends:
+            # Only this chunk is copied out of the mapping, in a thread since it may fault pages in
+            read = asyncio.ensure_future(
+                asyncio.to_thread(mm.__getitem__, slice(index * chunk_size, (index + 1) * chunk_size))
+            )
+            try:
+                chunk = await asyncio.shield(read)
+            except asyncio.CancelledError:
+                # The mapping closes once we return; let the thread finish reading from it first
+                await asyncio.wait([read])
+                raise
+            await self._send(
+                "POST",
+                data={"command": "APPEND", "media_id": media_id, "segment_index": str(index)},
+                files={"media": ("blob", chunk, "application/octet-stream")}
+            )
+        await self.redis_handler.mark_media_segment(media_key, index, expires_at)
+
+    async def _wait_for_processing(self, media_id: str, data: dict) -> dict:
+        """Poll STATUS until server-side processing (video, GIF) finishes"""
+        # The outbox job's claim must outlive the wait, or another worker redoes the upload meanwhile
+        timeout = min(self.settings.MEDIA_PROCESSING_TIMEOUT, self.settings.OUTBOX_VISIBILITY_TIMEOUT / 2)
+        deadline = time.monotonic() + timeout
+        info = data.get("processing_info")
+        while info and info.get("state") in ("pending", "in_progress"):
+            if time.monotonic() > deadline:
+                raise MediaUploadError(f"Media {media_id} still processing after {timeout}s")
+            await asyncio.sleep(info.get("check_after_secs", 1))
+            data = self._data(await self._send("GET", params={"command": "STATUS", "media_id": media_id}))
+            info = data.get("processing_info")
+        if info and info.get("state") == "failed":
+            raise MediaUploadError(f"Media {media_id} processing failed: {info.get('error')}")
+        return data
+
+    async def upload(self, attachment: str) -> str:
+        """Upload a file from MEDIA_DIR and return its media id"""
+        path = self.resolve(attachment)
+        size = path.stat().st_size
+        if size == 0:
+            raise ValueError(f"Attachment is empty: {attachment}")
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        category = self._category(media_type)
+        media_key = f"{await asyncio.to_thread(self._digest, path)}:{category}"
+
+        cached = await self.redis_handler.get_cached_media_id(media_key)
+        if cached:
+            logger.info(f"Reusing media {cached} for {attachment}")
+            return cached
+
+        await self.rate_limiter.check("media")
+        try:
+            upload = await self.redis_handler.get_media_upload(media_key)
+            if upload:
+                media_id, expires_at, done = upload["media_id"], int(upload["expires_at"]), upload["segments"]
+                logger.info(f"Resuming upload of {attachment} as media {media_id} ({len(done)} segments done)")
+            else:
+                media_id, expires_at = await self._init(size, media_type, category)
+                done = set()
+                await self.redis_handler.start_media_upload(media_key, media_id, expires_at)
+
+            segments = [i for i in range(math.ceil(size / self.settings.MEDIA_CHUNK_SIZE)) if i not in done]
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Let every append finish before the mapping closes; finished segments are kept for a resume
+                results = await asyncio.gather(
+                    *(self._append(mm, media_key, media_id, i, expires_at) for i in segments),
+                    return_exceptions=True
+                )
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                raise next((e for e in errors if isinstance(e, RateLimited)), errors[0])
+
+            data = self._data(await self._send("POST", data={"command": "FINALIZE", "media_id": media_id}))
+            data = await self._wait_for_processing(media_id, data)
+        except MediaUploadError:
+            # X rejected this upload; start over next time
+            await self.redis_handler.clear_media_upload(media_key)
+            raise
+
+        await self.redis_handler.clear_media_upload(media_key)
+        ttl = int(data.get("expires_after_secs") or DEFAULT_MEDIA_EXPIRY) - MEDIA_EXPIRY_MARGIN
+        if ttl > 0:
+            await self.redis_handler.cache_media_id(media_key, media_id, ttl)
+        logger.info(f"Uploaded {attachment} ({size} bytes, {len(segments)} segments) as media {media_id}")
+        return media_id
+
+    async def upload_all(self, attachments: list) -> list:
+        """Upload attachments concurrently, returning media ids in the same order
+
+        The first failure cancels the other uploads; what they appended so far
+        is kept for a resume.
+        """
+        if not attachments:
+            return []
+        tasks = [asyncio.create_task(self.upload(a)) for a in attachments]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            failed = next((t for t in tasks if t in done and t.exception() is not None), None)
+            if failed is not None:
+                raise failed.exception()
+            return [t.result() for t in tasks]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+_uploader: MediaUploader | None = None
+
+def get_media_uploader() -> MediaUploader:
+    """Get the process-wide media uploader"""
+    global _uploader
+    if _uploader is None:
+        _uploader = MediaUploader()
+    return _uploader
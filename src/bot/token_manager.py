@@ -0,0 +1,181 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.utils.http_client import x_api_post
+from src.utils.auth_helper import get_basic_auth_header
+from src.utils.metrics import TOKEN_REFRESHES
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class MissingTokensError(Exception):
+    """Raised when no Twitter tokens are stored; someone has to authenticate again"""
+
+    def __init__(self):
+        super().__init__("No Twitter tokens found")
+
+class TokenManager:
+    """Caches Twitter OAuth tokens in-process and refreshes them ahead of expiry"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self._tokens = None
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task = None
+
+    @staticmethod
+    def _with_expiry(tokens: dict) -> dict:
+        """Derive an absolute expires_at from expires_in when missing"""
+        if 'expires_at' not in tokens and 'expires_in' in tokens:
+            tokens = {**tokens, 'expires_at': time.time() + float(tokens['expires_in'])}
+        return tokens
+
+    def _needs_refresh(self, tokens: dict) -> bool:
+        """Check if tokens expire within the refresh margin"""
+        expires_at = tokens.get('expires_at')
+        if expires_at is None:
+            return False
+        return float(expires_at) - time.time() <= self.settings.TOKEN_REFRESH_MARGIN
+
+    async def get_tokens(self) -> dict:
+        """Get cached tokens, loading from Redis only on a cache miss"""
+        if self._tokens is None:
+            tokens = await self.redis_handler.get_twitter_tokens("bot_user")
+            self._tokens = self._with_expiry(tokens) if tokens else None
+        return self._tokens
+
+    async def get_valid_tokens(self) -> dict:
+        """Get cached tokens, refreshing inline only if they have already expired"""
+        tokens = await self.get_tokens()
+        if tokens and tokens.get('expires_at') is not None and float(tokens['expires_at']) <= time.time():
+            tokens = await self.refresh(stale_access_token=tokens.get('access_token'))
+        return tokens
+
+    async def store_tokens(self, tokens: dict):
+        """Persist tokens to Redis and update the in-process cache"""
+        tokens = self._with_expiry(tokens)
+        await self.redis_handler.store_twitter_tokens("bot_user", tokens)
+        self._tokens = tokens
+
+    def invalidate(self):
+        """Drop the cached tokens so the next read goes to Redis"""
+        self._tokens = None
+
+    async def _request_refresh(self, refresh_token: str) -> dict:
+        """Exchange a refresh token for new tokens"""
+        data = {
+            'refresh_token': refresh_token,
+            'grant_type': 'refresh_token'
+        }
+
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Authorization': get_basic_auth_header(self.settings.CLIENT_ID, self.settings.CLIENT_SECRET)
+        }
+
+        response = await x_api_post(
+            'https://api.x.com/2/oauth2/token',
+            idempotent=False,
+            data=data,  # No need to encode - httpx handles this
+            headers=headers
+        )
+
+        if response.status_code != 200:
+            logger.error(f"Token refresh failed with status {response.status_code}")
+            logger.error(f"Response: {response.text}")
+            raise Exception(f"Token refresh failed: {response.text}")
+
+        return response.json()
+
+    async def refresh(self, stale_access_token: str = None) -> dict:
+        """Refresh tokens, with at most one refresh in flight across all workers
+
+        If stale_access_token is given and another task or worker has already
+        replaced it, the newer tokens are returned without refreshing again.
+        """
+        async with self._refresh_lock:
+            try:
+                if (stale_access_token and self._tokens
+                        and self._tokens.get('access_token') != stale_access_token):
+                    TOKEN_REFRESHES.labels("coalesced").inc()
+                    return self._tokens
+
+                lock = self.redis_handler.token_refresh_lock(
+                    timeout=self.settings.TOKEN_REFRESH_LOCK_TIMEOUT,
+                    blocking_timeout=self.settings.TOKEN_REFRESH_LOCK_TIMEOUT
+                )
+                async with lock:
+                    # Another worker may have refreshed while we waited
+                    tokens = await self.redis_handler.get_twitter_tokens("bot_user")
+                    if not tokens:
+                        self._tokens = None
+                        raise MissingTokensError()
+
+                    tokens = self._with_expiry(tokens)
+                    if stale_access_token:
+                        already_refreshed = tokens.get('access_token') != stale_access_token
+                    else:
+                        already_refreshed = not self._needs_refresh(tokens)
+                    if already_refreshed:
+                        TOKEN_REFRESHES.labels("coalesced").inc()
+                        self._tokens = tokens
+                        return tokens
+
+                    if 'refresh_token' not in tokens:
+                        raise Exception("No refresh token available")
+
+                    logger.info("Refreshing Twitter access token...")
+                    new_tokens = await self._request_refresh(tokens['refresh_token'])
+                    await self.store_tokens(new_tokens)
+                    TOKEN_REFRESHES.labels("refreshed").inc()
+                    logger.info("Twitter access token refreshed")
+                    return self._tokens
+            except Exception as e:
+                TOKEN_REFRESHES.labels("failed").inc()
+                logger.error(f"Failed to refresh token: {str(e)}")
+                raise
+
+    async def _refresh_loop(self):
+        while True:
+            delay = 60.0
+            try:
+                tokens = await self.get_tokens()
+                if tokens and tokens.get('expires_at') is not None:
+                    if self._needs_refresh(tokens):
+                        await self.refresh()
+                        tokens = self._tokens
+                    refresh_at = float(tokens['expires_at']) - self.settings.TOKEN_REFRESH_MARGIN
+                    delay = max(refresh_at - time.time(), 1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Proactive token refresh failed: {str(e)}")
+            await asyncio.sleep(delay)
+
+    def start(self):
+        """Start refreshing tokens in the background ahead of expiry"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+            logger.info("Token refresh task started")
+
+    async def stop(self):
+        """Stop the background refresh task"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+            logger.info("Token refresh task stopped")
+
+_token_manager: TokenManager | None = None
+
+def get_token_manager() -> TokenManager:
+    """Get the process-wide token manager"""
+    global _token_manager
+    if _token_manager is None:
+        _token_manager = TokenManager()
+    return _token_manager
@@ -1,7 +1,9 @@
-import requests
 from src.config.settings import get_settings
-from src.utils.redis_handler import RedisHandler
-from src.utils.auth_helper import get_basic_auth_header
+from src.utils.http_client import x_api_post
+from src.bot.token_manager import MissingTokensError, get_token_manager
+from src.utils.rate_limiter import RateLimited, get_rate_limit_tracker
+from src.utils.budget_planner import get_budget_planner
+from src.utils.structured_logging import log_payload
 import logging
 import json
 
@@ -10,83 +12,68 @@ logger = logging.getLogger(__name__)
 class TwitterBot:
     def __init__(self):
         self.settings = get_settings()
-        self.redis_handler = RedisHandler()
+        self.token_manager = get_token_manager()
+        self.rate_limiter = get_rate_limit_tracker()
     
-    async def refresh_token(self, refresh_token: str):
+    async def refresh_token(self):
         """Refresh the access token"""
-        try:
-            data = {
-                'refresh_token': refresh_token,
-                'grant_type': 'refresh_token'
-            }
-            
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Authorization': get_basic_auth_header(self.settings.CLIENT_ID, self.settings.CLIENT_SECRET)
-            }
-            
-            response = requests.post(
-                'https://api.x.com/2/oauth2/token',
-                data=data,  # No need to encode - requests handles this
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                new_tokens = response.json()
-                self.redis_handler.store_twitter_tokens("bot_user", new_tokens)
-                return new_tokens
-            else:
-                logger.error(f"Token refresh failed with status {response.status_code}")
-                logger.error(f"Response: {response.text}")
-                raise Exception(f"Token refresh failed: {response.text}")
-                
-        except Exception as e:
-            logger.error(f"Failed to refresh token: {str(e)}")
-            raise
+        return await self.token_manager.refresh()
 
-    async def post_tweet(self, content: str):
-        """Post a tweet to Twitter"""
+    async def post_tweet(self, content: str, media_ids: list = None):
+        """Post a tweet to Twitter, with media uploaded through MediaUploader"""
         try:
-            tokens = self.redis_handler.get_twitter_tokens("bot_user")
-            logger.info(f"Tokens received in TwitterBot: {tokens}")
+            tokens = await self.token_manager.get_valid_tokens()
             
             if not tokens:
-                raise Exception("No Twitter tokens found")
+                raise MissingTokensError()
             
             # Use Bearer token for API requests
             url = "https://api.x.com/2/tweets"
             payload = {"text": content}
-            headers = {
-                "Authorization": f"Bearer {tokens['access_token']}",
-                "Content-Type": "application/json",
-            }
-            
-            logger.info(f"Making request to: {url}")
-            logger.info(f"With payload: {payload}")
-            logger.info("Headers prepared with Bearer token")
+            if media_ids:
+                payload["media"] = {"media_ids": media_ids}
             
-            response = requests.post(url, json=payload, headers=headers)
+            # Fail fast if a known window is already exhausted
+            await self.rate_limiter.check("tweets")
             
-            logger.info("Response details:")
-            logger.info(f"Status code: {response.status_code}")
-            logger.info(f"Response headers: {dict(response.headers)}")
-            logger.info(f"Response body: {response.text}")
-            logger.info(f"Response content type: {response.headers.get('content-type')}")
+            for attempt in range(self.settings.TOKEN_REFRESH_MAX_RETRIES + 1):
+                headers = {
+                    "Authorization": f"Bearer {tokens['access_token']}",
+                    "Content-Type": "application/json",
+                }
+                
+                log_payload(logger, "x_api_request", "POST %s payload: %s", url, payload)
+                
+                response = await x_api_post(url, idempotent=False, json=payload, headers=headers)
+                
+                logger.info(f"X API responded {response.status_code}")
+                log_payload(logger, "x_api_response", "Response headers: %s body: %s", response.headers, response.text)
+                
+                if response.status_code == 429:
+                    raise await self.rate_limiter.error_from_response("tweets", response)
+                await self.rate_limiter.record("tweets", response.headers)
+                
+                if (response.status_code == 401 and 'refresh_token' in tokens
+                        and attempt < self.settings.TOKEN_REFRESH_MAX_RETRIES):
+                    logger.error(f"Twitter API error: {response.text}")
+                    logger.info("Attempting token refresh...")
+                    tokens = await self.token_manager.refresh(stale_access_token=tokens['access_token'])
+                    continue
+                break
             
             if response.status_code != 201:
                 logger.error(f"Twitter API error: {response.text}")
-                if response.status_code == 401:
-                    logger.info("Attempting token refresh...")
-                    if 'refresh_token' in tokens:
-                        new_tokens = await self.refresh_token(tokens['refresh_token'])
-                        return await self.post_tweet(content)
                 raise Exception(f"Failed to post tweet: {response.text}")
                 
             tweet_id = response.json()['data']['id']
+            await get_budget_planner().record_post()
             logger.info(f"Tweet posted successfully! ID: {tweet_id}")
             logger.info(f"Tweet URL: https://twitter.com/i/web/status/{tweet_id}")
             return tweet_id
             
+        except RateLimited as e:
+            logger.warning(f"Failed to post tweet: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Failed to post tweet: {str(e)}")
             logger.exception("Full traceback:")  # Log full traceback
@@ -10,12 +10,115 @@ class Settings(BaseSettings):
     
     # Anthropic API
     ANTHROPIC_API_KEY: str
+    ANTHROPIC_MODEL: str = "claude-3-sonnet-20240229"
+    ANTHROPIC_TIMEOUT: float = 60.0
+    ANTHROPIC_CONNECT_TIMEOUT: float = 5.0
+    ANTHROPIC_MAX_CONNECTIONS: int = 10
+    ANTHROPIC_MAX_RETRIES: int = 0  # Retries go through src.utils.resilience
+    # Off by default: the default model can't cache and the persona is under every model's minimum
+    ANTHROPIC_PROMPT_CACHING: bool = False
+    ANTHROPIC_STREAMING: bool = True
+    
+    # Retry/backoff and circuit breakers for Anthropic, X API and Redis
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY: float = 0.5
+    RETRY_MAX_DELAY: float = 10.0
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RECOVERY_TIMEOUT: float = 30.0
+    
+    # Live generation hedging and deadline
+    GENERATION_DEADLINE: float = 45.0
+    HEDGE_PERCENTILE: float = 90.0
+    HEDGE_DEFAULT_DELAY: float = 10.0
+    
+    # Anthropic pricing in USD per million tokens, for usage stats
+    ANTHROPIC_INPUT_COST_PER_MTOK: float = 3.0
+    ANTHROPIC_OUTPUT_COST_PER_MTOK: float = 15.0
+    ANTHROPIC_CACHE_WRITE_COST_PER_MTOK: float = 3.75
+    ANTHROPIC_CACHE_READ_COST_PER_MTOK: float = 0.30
     
     # Redis Configuration
     REDIS_URL: str
+    REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_RETRY_ATTEMPTS: int = 3
+    
+    # Twitter token management
+    TOKEN_REFRESH_MARGIN: float = 300.0
+    TOKEN_REFRESH_LOCK_TIMEOUT: float = 30.0
+    TOKEN_REFRESH_MAX_RETRIES: int = 1
+    
+    # Posting budget and schedule
+    SCHEDULER_TIMEZONE: str = "America/Chicago"
+    POSTING_WINDOW_START_HOUR: int = 9
+    POSTING_WINDOW_END_HOUR: int = 20
+    DAILY_POST_QUOTA: int = 5
+    MONTHLY_POST_QUOTA: int = 500
+    MIN_POST_INTERVAL_MINUTES: int = 30
+    
+    # Scheduler job persistence
+    SCHEDULER_JOBSTORE: str = "redis"
+    SCHEDULER_MISFIRE_GRACE_TIME: int = 3600
+    SCHEDULER_COALESCE: bool = True
+    
+    # Scheduler leader election across workers
+    LEADER_ELECTION_ENABLED: bool = True
+    LEADER_LEASE_TTL: float = 30.0
+    
+    # Tweet outbox
+    OUTBOX_IDEMPOTENCY_TTL: int = 7 * 24 * 60 * 60
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_VISIBILITY_TIMEOUT: float = 300.0
+    OUTBOX_RETRY_BASE_DELAY: float = 30.0  # Doubles per failed attempt
+    OUTBOX_RETRY_MAX_DELAY: float = 900.0
+    
+    # Outbox worker (python -m src.worker)
+    WORKER_EMBEDDED: bool = True  # Also run a worker inside the web process
+    WORKER_CONCURRENCY: int = 2
+    WORKER_DRAIN_TIMEOUT: float = 30.0
+    WORKER_METRICS_PORT: int = 0  # Serve /metrics from standalone workers; 0 disables
+    
+    # Admission control for /post-tweet and /test-tweet
+    ADMISSION_MAX_CONCURRENT: int = 4
+    ADMISSION_MAX_QUEUE: int = 16
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0
+    CLIENT_BUCKET_CAPACITY: int = 5
+    CLIENT_BUCKET_REFILL_PER_HOUR: int = 10
+    # Proxies in front of the app that append to X-Forwarded-For (Render's load balancer is one)
+    TRUSTED_PROXY_HOPS: int = 1
+    POST_COALESCE_WINDOW: int = 10  # Seconds; 0 disables coalescing
+    
+    # Bearer token for /admin endpoints; unset disables them
+    ADMIN_TOKEN: str | None = None
+    PROFILE_MAX_SECONDS: int = 60
+    
+    # Event loop watchdog: flags calls that block the loop longer than the threshold
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL: float = 0.1
+    LOOP_STALL_THRESHOLD: float = 0.25
+    
+    # Seconds between background health checks behind /readyz and /health
+    HEALTH_CHECK_INTERVAL: float = 15.0
+    
+    # Chunked media uploads; attachments are file names inside MEDIA_DIR
+    MEDIA_DIR: str = "media"
+    MEDIA_CHUNK_SIZE: int = 4 * 1024 * 1024
+    MEDIA_UPLOAD_CONCURRENCY: int = 3
+    # Kept well under OUTBOX_VISIBILITY_TIMEOUT so another worker doesn't claim the job mid-upload
+    MEDIA_PROCESSING_TIMEOUT: float = 120.0
+    
+    # Pre-generated tweet buffer
+    TWEET_BUFFER_LOW_WATERMARK: int = 2
+    TWEET_BUFFER_HIGH_WATERMARK: int = 5
+    TWEET_BUFFER_MAX_AGE_HOURS: float = 48.0
+    TWEET_BUFFER_REFILL_INTERVAL: float = 300.0
     
     # Application Settings
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_PAYLOAD_PER_MINUTE: int = 10  # Verbose payload logs per kind per minute before sampling
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
     ENVIRONMENT: str = "development"
     
     # Add proxy settings with None defaults
@@ -23,6 +126,14 @@ class Settings(BaseSettings):
     HTTPS_PROXY: str | None = None
     NO_PROXY: str | None = None
     
+    # Shared HTTP client settings
+    HTTP2_ENABLED: bool = True
+    HTTP_TIMEOUT: float = 15.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    
     class Config:
         env_file = ".env"
 
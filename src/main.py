@@ -1,16 +1,34 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Query
-from fastapi.responses import RedirectResponse
+from src.utils.startup import get_startup_report
+# Created before the other imports so the report times them
+startup_report = get_startup_report()
+from fastapi import FastAPI, HTTPException, Request, Query, Header, Depends
+from fastapi.responses import RedirectResponse, JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from src.bot.twitter_bot import TwitterBot
-from src.bot.content_generator import ContentGenerator
-from src.utils.scheduler import TweetScheduler
-from src.utils.redis_handler import RedisHandler
+from src.bot.media_uploader import MAX_ATTACHMENTS, get_media_uploader
+from src.utils.scheduler import get_scheduler
+from src.utils.async_redis_handler import get_async_redis_handler, close_async_redis
+from src.utils.http_client import close_http_client
+from src.utils.anthropic_client import close_anthropic_client
+from src.utils.tweet_buffer import get_tweet_buffer
+from src.utils.outbox import get_tweet_outbox
+from src.worker import get_outbox_worker
+from src.bot.token_manager import get_token_manager
+from src.utils.rate_limiter import RateLimited
+from src.utils.leader_election import get_leader_elector
+from src.utils.usage_tracker import get_usage_tracker
+from src.utils.admission import Rejected, get_admission_controller
+from src.utils.health import get_health_monitor
+from src.utils.profiling import SamplingProfiler, get_allocation_tracker
+from src.utils.structured_logging import CorrelationIdMiddleware, configure_logging, stop_logging
+from src.utils.loop_watchdog import get_loop_watchdog
 import logging
 from src.config.settings import get_settings
 import base64
 import hashlib
+import secrets
 import re
 import os
-from requests_oauthlib import OAuth2Session
 import json
 import datetime
 import random
@@ -19,17 +37,33 @@ from contextlib import asynccontextmanager
 
 # Initialize FastAPI after lifespan definition
 app = FastAPI()
+app.add_middleware(CorrelationIdMiddleware)
 settings = get_settings()
 
-# Configure logging
-logging.basicConfig(
-    level=settings.LOG_LEVEL,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging; records are written by a background thread
+configure_logging(settings)
 logger = logging.getLogger(__name__)
 
-# Initialize scheduler at module level
-scheduler = TweetScheduler()
+startup_report.mark("imports")
+
+async def startup_checks():
+    """Check Redis and tokens concurrently in the background; /readyz reports the outcome"""
+    redis_handler = get_async_redis_handler()
+    with startup_report.phase("checks"):
+        redis_connected, has_tokens = await asyncio.gather(
+            redis_handler.verify_connection(),
+            redis_handler.has_tokens(),
+            return_exceptions=True
+        )
+    
+    if redis_connected is True:
+        logger.info("Redis connection established")
+    else:
+        logger.error("Redis connection failed - Not ready until it recovers")
+    if has_tokens is True:
+        logger.info("Twitter tokens verified")
+    else:
+        logger.warning("No Twitter tokens found - Authentication required")
 
 @app.on_event("startup")
 async def startup():
@@ -37,31 +71,29 @@ async def startup():
     try:
         logger.info("=== Application Startup Sequence ===")
         
-        # 1. Check Redis connection
-        logger.info("Checking Redis connection...")
-        redis_handler = RedisHandler()
-        if not redis_handler.verify_connection():
-            raise Exception("Redis connection failed")
-        logger.info("Redis connection established")
+        # 1. Check Redis and tokens without holding up startup
+        app.state.startup_checks = asyncio.create_task(startup_checks())
         
-        # 2. Verify tokens exist
-        logger.info("Verifying Twitter tokens...")
-        if not redis_handler.has_tokens():
-            logger.warning("No Twitter tokens found - Authentication required")
-        else:
-            logger.info("Twitter tokens verified")
+        # 2. Start background tasks; clients are created on first use
+        with startup_report.phase("background_tasks"):
+            if settings.LOOP_WATCHDOG_ENABLED:
+                get_loop_watchdog().start()
+            get_token_manager().start()
+            get_leader_elector().start()
+            get_tweet_buffer().start()
+            # Post queued tweets here too unless workers run separately
+            if settings.WORKER_EMBEDDED:
+                get_outbox_worker().start()
         
         # 3. Start scheduler
         logger.info("Initializing scheduler...")
-        if scheduler.is_running():
-            logger.info("Scheduler already running")
-            next_run = scheduler.get_next_run_time()
-            logger.info(f"Next scheduled run: {next_run}")
-        else:
-            scheduler.start()
-            next_run = scheduler.get_next_run_time()
-            logger.info(f"Scheduler started - Next run at: {next_run}")
+        with startup_report.phase("scheduler"):
+            await get_scheduler().start()
+        
+        # 4. Keep the probe snapshot fresh
+        get_health_monitor().start()
         
+        startup_report.finish()
         logger.info("=== Startup Complete ===")
     except Exception as e:
         logger.error("=== Startup Failed ===")
@@ -73,14 +105,57 @@ async def startup():
 async def shutdown_scheduler():
     """Handle shutdown event"""
     try:
-        if scheduler.is_running():
-            next_run = scheduler.get_next_run_time()
-            logger.info(f"Preserving scheduler - Next run at: {next_run}")
-            scheduler.shutdown()  # This will now be quieter
-        else:
-            logger.warning("No active scheduler found during shutdown")
+        await get_health_monitor().stop()
+        await get_scheduler().shutdown()  # Jobs persist in the job store
+        if settings.WORKER_EMBEDDED:
+            await get_outbox_worker().stop()
+        await get_tweet_buffer().stop()
+        await get_token_manager().stop()
+        await get_leader_elector().stop()
+        await get_loop_watchdog().stop()
+        await close_http_client()
+        await close_anthropic_client()
+        await close_async_redis()
     except Exception as e:
         logger.error(f"Shutdown error: {str(e)}")
+    finally:
+        stop_logging()
+
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, exc: Rejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def client_id(request: Request) -> str:
+    """Caller address, taken from the proxy header when behind Render's load balancer
+
+    Only the entries our own proxies appended are trusted: anything to their
+    left is whatever the caller sent, and a fresh value per request would
+    get a fresh token bucket.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and settings.TRUSTED_PROXY_HOPS > 0:
+        hops = [hop.strip() for hop in forwarded.split(",")]
+        return hops[-min(settings.TRUSTED_PROXY_HOPS, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+async def admission(request: Request):
+    """Per-client rate limit and concurrency limit for endpoints that spend X or Anthropic quota"""
+    async with get_admission_controller().admit(client_id(request)):
+        yield
+
+async def require_admin(authorization: str | None = Header(default=None)):
+    """Allow only requests bearing ADMIN_TOKEN"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.ADMIN_TOKEN}"
+    if authorization is None or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(status_code=401, detail="Admin token required")
+
+_profile_lock = asyncio.Lock()
 
 # Add a root endpoint to prevent 404s
 @app.head("/")
@@ -88,69 +163,146 @@ async def shutdown_scheduler():
 async def root():
     return {"status": "running", "message": "City Farmers Bot API"}
 
-@app.post("/post-tweet")
-async def create_tweet(background_tasks: BackgroundTasks, content_type: str = "educational"):
-    """Endpoint to generate and post a tweet"""
+@app.post("/post-tweet", status_code=202, dependencies=[Depends(admission)])
+async def create_tweet(
+    attachments: list[str] = Query(default=[], description=f"Up to {MAX_ATTACHMENTS} file names in MEDIA_DIR"),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key")
+):
+    """Endpoint to queue a tweet for posting"""
+    if len(attachments) > MAX_ATTACHMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ATTACHMENTS} attachments per tweet")
     try:
-        logger.info(f"Received request to create {content_type} tweet")
-        content_generator = ContentGenerator()
-        twitter_bot = TwitterBot()
+        for attachment in attachments:
+            get_media_uploader().resolve(attachment)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        logger.info(f"Received request to create tweet with {len(attachments)} attachments")
         
-        # Generate content
-        logger.info("Attempting to generate content...")
-        content = await content_generator.generate_tweet(content_type)
+        # Identical requests close together share one job
+        if idempotency_key is None:
+            idempotency_key = await get_admission_controller().coalesce_key(":".join(attachments))
         
-        # Post tweet in background
-        logger.info("Adding tweet to background tasks...")
-        background_tasks.add_task(twitter_bot.post_tweet, content)
+        # Persist the job before answering; an outbox worker uploads the media and posts it
+        job = await get_tweet_outbox().submit(
+            idempotency_key=idempotency_key,
+            attachments=attachments
+        )
         
-        return {"status": "Tweet generation initiated", "content": content}
+        return {
+            "status": job['status'],
+            "job_id": job['id'],
+            "status_url": f"/post-tweet/{job['id']}"
+        }
     except Exception as e:
         logger.error(f"Failed to create tweet: {str(e)}")
         logger.exception("Full traceback:")  # This will log the full stack trace
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/post-tweet/{job_id}")
+async def get_tweet_job(job_id: str):
+    """Get the status of a queued tweet"""
+    job = await get_tweet_outbox().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe served from the health monitor's cached snapshot"""
+    health_monitor = get_health_monitor()
+    if not health_monitor.is_ready():
+        return JSONResponse(status_code=503, content=health_monitor.snapshot or {"ready": False})
+    return health_monitor.snapshot
+
+@app.get("/startup-report")
+async def startup_report_endpoint():
+    """Time spent in each startup phase"""
+    return startup_report.as_dict()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000)
+):
+    """Sample every thread's stack for N seconds and return a speedscope profile"""
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+        logger.info(f"Profiling for {seconds}s at {interval_ms}ms intervals")
+        # Sampling runs in a thread so the event loop keeps serving while it's observed
+        profiler = SamplingProfiler(interval=interval_ms / 1000)
+        profile = await asyncio.to_thread(profiler.run, seconds)
+    filename = f"profile-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.speedscope.json"
+    return JSONResponse(content=profile, headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+@app.post("/admin/tracemalloc/start", dependencies=[Depends(require_admin)])
+async def admin_tracemalloc_start(frames: int = Query(10, ge=1, le=50)):
+    """Start allocation tracking and take the baseline snapshot"""
+    return get_allocation_tracker().start(frames)
+
+@app.get("/admin/tracemalloc/diff", dependencies=[Depends(require_admin)])
+async def admin_tracemalloc_diff(
+    limit: int = Query(25, ge=1, le=200),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    reset: bool = False
+):
+    """Top allocation changes since the baseline; reset=true makes this the new baseline"""
+    tracker = get_allocation_tracker()
+    if not tracker.tracing:
+        raise HTTPException(status_code=409, detail="Allocation tracking not started")
+    return await asyncio.to_thread(tracker.diff, limit, group_by, reset)
+
+@app.post("/admin/tracemalloc/stop", dependencies=[Depends(require_admin)])
+async def admin_tracemalloc_stop():
+    """Stop allocation tracking"""
+    return get_allocation_tracker().stop()
+
+@app.get("/admin/loop-stalls", dependencies=[Depends(require_admin)])
+async def admin_loop_stalls():
+    """Recent event loop stalls with the stack and task that blocked the loop"""
+    return {"stalls": list(get_loop_watchdog().recent)}
+
 @app.get("/health")
 async def health_check():
-    """Check system health"""
-    try:
-        redis_handler = RedisHandler()
-        redis_connected = redis_handler.verify_connection()
-        has_tokens = redis_handler.has_tokens() if redis_connected else False
-        scheduler_running = scheduler.is_running()
-        next_run = scheduler.get_next_run_time()
-        
-        is_healthy = redis_connected and has_tokens and scheduler_running
-        
-        if not hasattr(health_check, 'first_check'):
-            health_check.first_check = True
-            logger.info("=== Initial Health Check ===")
-            logger.info(f"Redis connected: {redis_connected}")
-            logger.info(f"Tokens present: {has_tokens}")
-            logger.info(f"Scheduler running: {scheduler_running}")
-            if next_run:
-                logger.info(f"Next scheduled run: {next_run}")
-        
-        return {
-            "status": "healthy" if is_healthy else "unhealthy",
-            "redis_connected": redis_connected,
-            "has_tokens": has_tokens,
-            "scheduler_running": scheduler_running,
-            "next_run": next_run.strftime("%Y-%m-%d %H:%M:%S %Z") if next_run else None
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {"status": "unhealthy", "error": str(e)}
+    """Check system health (from the cached snapshot)"""
+    health_monitor = get_health_monitor()
+    snapshot = health_monitor.snapshot
+    if snapshot is None:
+        return {"status": "unhealthy", "error": "Health not checked yet"}
+    
+    is_healthy = health_monitor.is_ready() and snapshot["tokens"]["present"]
+    return {
+        "status": "healthy" if is_healthy else "unhealthy",
+        "redis_connected": snapshot["redis"]["connected"],
+        "has_tokens": snapshot["tokens"]["present"],
+        "scheduler_running": snapshot["scheduler"]["running"],
+        "next_run": snapshot["scheduler"]["next_run"],
+        "checked_at": snapshot["checked_at"],
+        "circuit_breakers": snapshot["circuit_breakers"]
+    }
 
 # OAuth 2.0 Configuration
 auth_url = "https://twitter.com/i/oauth2/authorize"
 token_url = "https://api.x.com/2/oauth2/token"
-scopes = ["tweet.read", "users.read", "tweet.write", "offline.access"]
+scopes = ["tweet.read", "users.read", "tweet.write", "media.write", "offline.access"]
 
 # Replace the runtime PKCE setup with a Redis-based one
 async def get_pkce_credentials():
-    redis_handler = RedisHandler()
-    credentials = redis_handler.get_pkce_credentials()
+    redis_handler = get_async_redis_handler()
+    credentials = await redis_handler.get_pkce_credentials()
     
     if not credentials:
         # Generate new credentials if none exist
@@ -164,7 +316,7 @@ async def get_pkce_credentials():
             "code_verifier": code_verifier,
             "code_challenge": code_challenge
         }
-        redis_handler.store_pkce_credentials(credentials)
+        await redis_handler.store_pkce_credentials(credentials)
     
     return credentials
 
@@ -172,6 +324,8 @@ async def get_pkce_credentials():
 async def twitter_auth():
     """Start OAuth flow"""
     credentials = await get_pkce_credentials()
+    # Only needed for the one-off OAuth flow, so imported here to keep startup fast
+    from requests_oauthlib import OAuth2Session
     oauth = OAuth2Session(
         settings.CLIENT_ID,
         redirect_uri=settings.REDIRECT_URI,
@@ -192,21 +346,23 @@ async def twitter_callback(
     """Handle OAuth callback"""
     try:
         credentials = await get_pkce_credentials()
+        from requests_oauthlib import OAuth2Session
         oauth = OAuth2Session(
             settings.CLIENT_ID,
             redirect_uri=settings.REDIRECT_URI,
             scope=scopes
         )
         
-        token = oauth.fetch_token(
+        # fetch_token is a blocking requests call; keep it off the event loop
+        token = await asyncio.to_thread(
+            oauth.fetch_token,
             token_url=token_url,
             client_secret=settings.CLIENT_SECRET,
             code_verifier=credentials["code_verifier"],
             code=code
         )
         
-        redis_handler = RedisHandler()
-        redis_handler.store_twitter_tokens("bot_user", token)
+        await get_token_manager().store_tokens(token)
         
         return {"message": "Successfully authenticated with Twitter"}
     except Exception as e:
@@ -217,14 +373,15 @@ async def twitter_callback(
 async def reset_auth():
     """Clear stored tokens and PKCE credentials"""
     try:
-        redis_handler = RedisHandler()
-        redis_handler.clear_all_tokens()
+        redis_handler = get_async_redis_handler()
+        await redis_handler.clear_all_tokens()
+        get_token_manager().invalidate()
         return {"message": "Successfully cleared all tokens"}
     except Exception as e:
         logger.error(f"Failed to clear tokens: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/test-tweet")
+@app.post("/test-tweet", dependencies=[Depends(admission)])
 async def test_tweet():
     """Post a simple test tweet"""
     try:
@@ -241,29 +398,57 @@ async def test_tweet():
                 "tweet_id": tweet_id,
                 "url": f"https://twitter.com/i/web/status/{tweet_id}"
             }
-        except Exception as e:
-            if "Too Many Requests" in str(e):
-                logger.warning("Rate limit detected in test endpoint - Notifying scheduler")
-                # Tell scheduler to delay
-                await scheduler.handle_rate_limit()
-                return {
-                    "status": "rate_limited",
-                    "message": "Rate limit hit - Scheduler has been notified to delay posts",
-                    "error": str(e)
-                }
-            raise
+        except RateLimited as e:
+            logger.warning("Rate limit detected in test endpoint - Notifying scheduler")
+            # Tell scheduler to resume after the window resets
+            await get_scheduler().handle_rate_limit(e.reset_at)
+            return {
+                "status": "rate_limited",
+                "message": "Rate limit hit - Scheduler has been notified to delay posts",
+                "reset_at": e.reset_at.isoformat(),
+                "error": str(e)
+            }
     except Exception as e:
         logger.error(f"Test tweet failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/schedule-plan")
+async def schedule_plan():
+    """Show the planned posting slots for the remaining budget"""
+    try:
+        plan = await get_scheduler().get_plan()
+        plan["slots"] = [slot.strftime("%Y-%m-%d %H:%M:%S %Z") for slot in plan["slots"]]
+        return plan
+    except Exception as e:
+        logger.error(f"Failed to get schedule plan: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/usage-stats")
+async def usage_stats(days: int = Query(7, ge=1, le=90)):
+    """Anthropic token usage, cost and prompt-cache hit rate per day"""
+    try:
+        generator = get_tweet_buffer().content_generator
+        return {
+            **await get_usage_tracker().stats(days),
+            "prompt_cache": {
+                "active": generator.cache_system,
+                "inactive_reason": generator.cache_inactive_reason,
+            },
+        }
+    except Exception as e:
+        logger.error(f"Failed to get usage stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/scheduler-status")
 async def scheduler_status():
     """Check scheduler status"""
     try:
-        next_run = scheduler.get_next_run_time()
+        scheduler = get_scheduler()
+        next_run = await scheduler.get_next_run_time()
         return {
-            "running": scheduler.is_running(),
-            "next_run": next_run.strftime("%Y-%m-%d %H:%M:%S %Z") if next_run else None
+            "running": await scheduler.is_running(),
+            "next_run": next_run.strftime("%Y-%m-%d %H:%M:%S %Z") if next_run else None,
+            "leader": await get_leader_elector().status()
         }
     except Exception as e:
         logger.error(f"Failed to get scheduler status: {str(e)}")
@@ -1,10 +1,10 @@
 import sys
 sys.path.append('.')  # Add project root to path
 
-from src.utils.redis_handler import RedisHandler
+from src.utils.redis_handler import get_redis_handler
 
 def store_initial_tokens():
-    redis_handler = RedisHandler()
+    redis_handler = get_redis_handler()
     
     # Initial tokens to store
     tokens = {
@@ -0,0 +1,99 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import math
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class Rejected(Exception):
+    """Request turned away by admission control"""
+
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        self.status_code = status_code
+        self.retry_after = max(math.ceil(retry_after), 1)
+        self.reason = reason
+        super().__init__(reason)
+
+class ConcurrencyLimiter:
+    """Caps concurrent requests, with a bounded queue of waiters
+
+    Callers past the queue bound, or that wait longer than the queue
+    timeout, are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise Rejected(503, self.queue_timeout, "Server busy - Too many queued requests")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Rejected(503, self.queue_timeout, "Server busy - Timed out waiting for a slot")
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+class AdmissionController:
+    """Per-client token buckets, a concurrency limit and request coalescing"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self.limiter = ConcurrencyLimiter(
+            self.settings.ADMISSION_MAX_CONCURRENT,
+            self.settings.ADMISSION_MAX_QUEUE,
+            self.settings.ADMISSION_QUEUE_TIMEOUT
+        )
+
+    async def check_client(self, client_id: str):
+        """Raise 429 once a client has spent its token bucket"""
+        allowed, retry_after = await self.redis_handler.take_client_token(
+            client_id,
+            self.settings.CLIENT_BUCKET_CAPACITY,
+            self.settings.CLIENT_BUCKET_REFILL_PER_HOUR / 3600
+        )
+        if not allowed:
+            logger.warning(f"Client {client_id} over its request budget - Retry in {retry_after:.0f}s")
+            raise Rejected(429, retry_after, "Too many requests")
+
+    @asynccontextmanager
+    async def admit(self, client_id: str):
+        """Admit one request from a client for the duration of the block"""
+        await self.check_client(client_id)
+        async with self.limiter.slot():
+            yield
+
+    async def coalesce_key(self, request_key: str) -> str | None:
+        """Idempotency key shared by every request with the same request_key within the coalesce window"""
+        window = self.settings.POST_COALESCE_WINDOW
+        if not window:
+            return None
+        token = await self.redis_handler.get_or_set(
+            f"coalesce:post-tweet:{request_key}", uuid.uuid4().hex, window
+        )
+        return f"coalesce:{request_key}:{token}"
+
+_controller: AdmissionController | None = None
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
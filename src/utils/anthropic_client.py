@@ -0,0 +1,43 @@
+from src.config.settings import get_settings
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: "AsyncAnthropic | None" = None
+
+def get_anthropic_client() -> "AsyncAnthropic":
+    """Get the process-wide async Anthropic client, importing the SDK on first use"""
+    global _client
+    if _client is None:
+        from anthropic import AsyncAnthropic
+        settings = get_settings()
+        timeout = httpx.Timeout(
+            settings.ANTHROPIC_TIMEOUT,
+            connect=settings.ANTHROPIC_CONNECT_TIMEOUT
+        )
+        # Custom pooled HTTP client with no proxy
+        http_client = httpx.AsyncClient(
+            proxies=None,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=settings.ANTHROPIC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ANTHROPIC_MAX_CONNECTIONS
+            )
+        )
+        _client = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            http_client=http_client,
+            timeout=timeout,
+            max_retries=settings.ANTHROPIC_MAX_RETRIES
+        )
+        logger.info("Created shared Anthropic client")
+    return _client
+
+async def close_anthropic_client():
+    """Close the shared Anthropic client and its connection pool"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        logger.info("Closed shared Anthropic client")
+    _client = None
@@ -0,0 +1,665 @@
+import redis
+import redis.asyncio as aioredis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from src.config.settings import get_settings
+from src.utils.resilience import resilient
+from src.utils.metrics import REDIS_OP_LATENCY, timed
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Take the lease if free and bump the fencing token
+ACQUIRE_LEASE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    local token = redis.call('INCR', KEYS[2])
+    return token
+end
+return nil
+"""
+
+# Extend the lease only if we still own it
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Drop the lease only if we still own it
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Accept an outbox job unless its idempotency key was seen, in one round trip
+OUTBOX_SUBMIT_SCRIPT = """
+local existing = redis.call('GET', KEYS[1])
+if existing then
+    return existing
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('HSET', KEYS[2],
+    'id', ARGV[1], 'idempotency_key', ARGV[3],
+    'content', ARGV[4], 'attachments', ARGV[7], 'status', 'pending', 'attempts', '0',
+    'created_at', ARGV[5], 'updated_at', ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[6], '*', 'job_id', ARGV[1])
+return ARGV[1]
+"""
+
+# Refill a token bucket by elapsed time and take one token if available
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+# Return the key's value, setting it first if missing
+GET_OR_SET_SCRIPT = """
+local existing = redis.call('GET', KEYS[1])
+if existing then
+    return existing
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return ARGV[1]
+"""
+
+# Move delayed outbox jobs that are due back onto the stream
+PROMOTE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job_id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job_id)
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', 'job_id', job_id)
+end
+return #due
+"""
+
+OUTBOX_STREAM = "outbox:stream"
+OUTBOX_STREAM_MAXLEN = 10000
+# Jobs waiting out a retry delay, scored by when they are due
+OUTBOX_DELAYED = "outbox:delayed"
+
+def redis_op(func):
+    """Time a handler method per method name and run it through the "redis" breaker"""
+    return timed(REDIS_OP_LATENCY.labels(func.__name__))(resilient("redis", max_attempts=1)(func))
+
+_pool: aioredis.ConnectionPool | None = None
+_handler: "AsyncRedisHandler | None" = None
+
+def get_async_connection_pool() -> aioredis.ConnectionPool:
+    """Process-wide asyncio Redis connection pool"""
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = aioredis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            retry=Retry(ExponentialBackoff(), settings.REDIS_RETRY_ATTEMPTS),
+            retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+        )
+    return _pool
+
+class AsyncRedisHandler:
+    """Non-blocking counterpart of RedisHandler built on redis.asyncio
+
+    Every operation goes through the "redis" circuit breaker. Retries on
+    connection errors are left to the pool's Retry so they aren't stacked.
+    """
+
+    def __init__(self, redis_client: aioredis.Redis = None):
+        self.settings = get_settings()
+        self.redis_client = redis_client or aioredis.Redis(connection_pool=get_async_connection_pool())
+
+    @redis_op
+    async def store_twitter_tokens(self, user_id: str, tokens: dict):
+        """Store Twitter OAuth tokens in Redis"""
+        try:
+            await self.redis_client.setex(
+                f"twitter_tokens:{user_id}",
+                24 * 60 * 60,  # 24 hour expiration
+                json.dumps(tokens)
+            )
+        except Exception as e:
+            logger.error(f"Failed to store Twitter tokens: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_twitter_tokens(self, user_id: str) -> dict:
+        """Retrieve Twitter OAuth tokens from Redis"""
+        try:
+            tokens = await self.redis_client.get(f"twitter_tokens:{user_id}")
+            if tokens:
+                if isinstance(tokens, bytes):
+                    tokens = tokens.decode('utf-8')
+                try:
+                    return json.loads(tokens)
+                except json.JSONDecodeError as e:
+                    logger.error(f"JSON decode error: {e}")
+                    raise
+            return None
+        except Exception as e:
+            logger.error(f"Failed to retrieve Twitter tokens: {str(e)}")
+            raise
+
+    def token_refresh_lock(self, timeout: float, blocking_timeout: float):
+        """Distributed lock so only one worker refreshes Twitter tokens at a time"""
+        return self.redis_client.lock(
+            "twitter_tokens_refresh_lock",
+            timeout=timeout,
+            blocking_timeout=blocking_timeout
+        )
+
+    @redis_op
+    async def acquire_leader_lease(self, worker_id: str, ttl_ms: int) -> int:
+        """Try to take the scheduler leader lease, returning the new fencing token"""
+        try:
+            token = await self.redis_client.eval(
+                ACQUIRE_LEASE_SCRIPT, 2,
+                "scheduler_leader", "scheduler_leader:fencing",
+                worker_id, ttl_ms
+            )
+            return int(token) if token is not None else None
+        except Exception as e:
+            logger.error(f"Failed to acquire leader lease: {str(e)}")
+            raise
+
+    @redis_op
+    async def renew_leader_lease(self, worker_id: str, ttl_ms: int) -> bool:
+        """Extend the scheduler leader lease if this worker still holds it"""
+        try:
+            return bool(await self.redis_client.eval(
+                RENEW_LEASE_SCRIPT, 1, "scheduler_leader", worker_id, ttl_ms
+            ))
+        except Exception as e:
+            logger.error(f"Failed to renew leader lease: {str(e)}")
+            raise
+
+    @redis_op
+    async def release_leader_lease(self, worker_id: str):
+        """Give up the scheduler leader lease if this worker holds it"""
+        try:
+            await self.redis_client.eval(RELEASE_LEASE_SCRIPT, 1, "scheduler_leader", worker_id)
+        except Exception as e:
+            logger.error(f"Failed to release leader lease: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_leader_lease(self) -> tuple:
+        """Get (current leader id, current fencing token)"""
+        try:
+            leader, token = await self.redis_client.mget("scheduler_leader", "scheduler_leader:fencing")
+            return (leader.decode('utf-8') if leader else None), (int(token) if token else None)
+        except Exception as e:
+            logger.error(f"Failed to get leader lease: {str(e)}")
+            raise
+
+    async def verify_connection(self):
+        """Verify Redis connection is working"""
+        try:
+            await self.redis_client.ping()
+            return True
+        except Exception as e:
+            logger.error(f"Redis connection failed: {str(e)}")
+            return False
+
+    async def has_tokens(self):
+        """Check if tokens exist
+
+        Not a @redis_op: get_twitter_tokens already goes through the breaker,
+        and an outer wrapper would count its swallowed errors as successes.
+        """
+        try:
+            tokens = await self.get_twitter_tokens("bot_user")
+            return bool(tokens)
+        except Exception:
+            return False
+
+    @redis_op
+    async def store_pkce_credentials(self, credentials: dict):
+        """Store PKCE credentials in Redis"""
+        try:
+            await self.redis_client.set("pkce_credentials", json.dumps(credentials))
+        except Exception as e:
+            logger.error(f"Failed to store PKCE credentials: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_pkce_credentials(self) -> dict:
+        """Retrieve PKCE credentials from Redis"""
+        try:
+            credentials = await self.redis_client.get("pkce_credentials")
+            return json.loads(credentials) if credentials else None
+        except Exception as e:
+            logger.error(f"Failed to retrieve PKCE credentials: {str(e)}")
+            raise
+
+    @redis_op
+    async def clear_all_tokens(self):
+        """Clear all stored tokens and credentials"""
+        try:
+            await self.redis_client.delete("pkce_credentials", "twitter_tokens:bot_user")
+            logger.info("Cleared all tokens from Redis")
+        except Exception as e:
+            logger.error(f"Failed to clear tokens: {str(e)}")
+            raise
+
+    @redis_op
+    async def push_tweet_drafts(self, drafts: list):
+        """Append pre-generated tweet drafts to the buffer"""
+        try:
+            if drafts:
+                await self.redis_client.rpush("tweet_buffer", *[json.dumps(d) for d in drafts])
+        except Exception as e:
+            logger.error(f"Failed to push tweet drafts: {str(e)}")
+            raise
+
+    @redis_op
+    async def pop_tweet_draft(self) -> dict:
+        """Pop the oldest tweet draft from the buffer"""
+        try:
+            draft = await self.redis_client.lpop("tweet_buffer")
+            return json.loads(draft) if draft else None
+        except Exception as e:
+            logger.error(f"Failed to pop tweet draft: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_tweet_buffer_length(self) -> int:
+        """Get number of buffered tweet drafts"""
+        try:
+            return await self.redis_client.llen("tweet_buffer")
+        except Exception as e:
+            logger.error(f"Failed to get tweet buffer length: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_recent_canned_tweets(self) -> list:
+        """Get the canned tweets posted most recently, newest first"""
+        try:
+            return [t.decode() for t in await self.redis_client.lrange("canned_tweets:recent", 0, -1)]
+        except Exception as e:
+            logger.error(f"Failed to get recent canned tweets: {str(e)}")
+            raise
+
+    @redis_op
+    async def record_canned_tweet(self, content: str, keep: int):
+        """Remember a canned tweet as used, keeping only the last `keep`"""
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.lrem("canned_tweets:recent", 0, content)
+                pipe.lpush("canned_tweets:recent", content)
+                pipe.ltrim("canned_tweets:recent", 0, keep - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to record canned tweet: {str(e)}")
+            raise
+
+    @redis_op
+    async def store_rate_limit_window(self, endpoint: str, window_name: str, window: dict):
+        """Store an X API rate-limit window until it resets"""
+        try:
+            key = f"rate_limit:{endpoint}:{window_name}"
+            ttl = max(int(window["reset"] - time.time()), 1)
+            await self.redis_client.setex(key, ttl, json.dumps(window))
+        except Exception as e:
+            logger.error(f"Failed to store rate limit window: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_rate_limit_window(self, endpoint: str, window_name: str) -> dict:
+        """Get a stored X API rate-limit window"""
+        try:
+            window = await self.redis_client.get(f"rate_limit:{endpoint}:{window_name}")
+            return json.loads(window) if window else None
+        except Exception as e:
+            logger.error(f"Failed to get rate limit window: {str(e)}")
+            raise
+
+    @redis_op
+    async def record_post(self, day: str, month: str):
+        """Count a successful post against the daily and monthly budgets"""
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.incr(f"posts:day:{day}")
+                pipe.expire(f"posts:day:{day}", 2 * 24 * 60 * 60)
+                pipe.incr(f"posts:month:{month}")
+                pipe.expire(f"posts:month:{month}", 32 * 24 * 60 * 60)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to record post: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_post_counts(self, day: str, month: str) -> tuple:
+        """Get (posts today, posts this month)"""
+        try:
+            daily, monthly = await self.redis_client.mget(f"posts:day:{day}", f"posts:month:{month}")
+            return int(daily or 0), int(monthly or 0)
+        except Exception as e:
+            logger.error(f"Failed to get post counts: {str(e)}")
+            raise
+
+    @redis_op
+    async def record_anthropic_usage(self, day: str, usage: dict):
+        """Add one response's token usage to the day's counters"""
+        try:
+            key = f"anthropic_usage:{day}"
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.hincrby(key, "requests", 1)
+                for field, value in usage.items():
+                    if value:
+                        pipe.hincrby(key, field, int(value))
+                pipe.expire(key, 90 * 24 * 60 * 60)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to record Anthropic usage: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_anthropic_usage(self, day: str) -> dict:
+        """Get the day's token usage counters"""
+        try:
+            usage = await self.redis_client.hgetall(f"anthropic_usage:{day}")
+            return {k.decode('utf-8'): int(v) for k, v in usage.items()}
+        except Exception as e:
+            logger.error(f"Failed to get Anthropic usage: {str(e)}")
+            raise
+
+    @redis_op
+    async def submit_outbox_job(self, job_id: str, idempotency_key: str, content: str,
+                                created_at: str, ttl: int, attachments: list = None) -> str:
+        """Store a pending outbox job, returning the existing job id for a repeated key"""
+        try:
+            existing = await self.redis_client.eval(
+                OUTBOX_SUBMIT_SCRIPT, 3,
+                f"outbox:idem:{idempotency_key}", f"outbox:job:{job_id}", OUTBOX_STREAM,
+                job_id, ttl, idempotency_key, content or "", created_at,
+                OUTBOX_STREAM_MAXLEN, json.dumps(attachments) if attachments else ""
+            )
+            return existing.decode('utf-8') if isinstance(existing, bytes) else existing
+        except Exception as e:
+            logger.error(f"Failed to submit outbox job: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_outbox_job(self, job_id: str) -> dict:
+        """Get an outbox job's fields"""
+        try:
+            job = await self.redis_client.hgetall(f"outbox:job:{job_id}")
+            return {k.decode('utf-8'): v.decode('utf-8') for k, v in job.items()} if job else None
+        except Exception as e:
+            logger.error(f"Failed to get outbox job: {str(e)}")
+            raise
+
+    @redis_op
+    async def update_outbox_job(self, job_id: str, fields: dict):
+        """Update an outbox job's fields"""
+        try:
+            await self.redis_client.hset(f"outbox:job:{job_id}", mapping=fields)
+        except Exception as e:
+            logger.error(f"Failed to update outbox job: {str(e)}")
+            raise
+
+    @staticmethod
+    def _outbox_entries(entries) -> list:
+        """(entry id, job id) pairs from stream entries, skipping trimmed ones"""
+        return [
+            (entry_id.decode('utf-8'), fields[b'job_id'].decode('utf-8'))
+            for entry_id, fields in entries
+            if fields and b'job_id' in fields
+        ]
+
+    @redis_op
+    async def ensure_outbox_group(self, group: str):
+        """Create the worker consumer group (and the stream) if they don't exist"""
+        try:
+            await self.redis_client.xgroup_create(OUTBOX_STREAM, group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                logger.error(f"Failed to create outbox consumer group: {str(e)}")
+                raise
+
+    @redis_op
+    async def read_outbox_jobs(self, group: str, consumer: str, count: int, block_ms: int) -> list:
+        """Read new jobs for this consumer, waiting up to block_ms"""
+        try:
+            response = await self.redis_client.xreadgroup(
+                group, consumer, {OUTBOX_STREAM: ">"}, count=count, block=block_ms
+            )
+            return self._outbox_entries(response[0][1]) if response else []
+        except Exception as e:
+            logger.error(f"Failed to read outbox jobs: {str(e)}")
+            raise
+
+    @redis_op
+    async def claim_stale_outbox_jobs(self, group: str, consumer: str, min_idle_ms: int, count: int,
+                                      start_id: str = "0-0") -> tuple:
+        """Take over jobs delivered to another consumer but not acked within min_idle_ms
+
+        Returns the cursor to continue the scan from ("0-0" once it has
+        covered the whole pending list) and the claimed entries.
+        """
+        try:
+            response = await self.redis_client.xautoclaim(
+                OUTBOX_STREAM, group, consumer, min_idle_ms, start_id=start_id, count=count
+            )
+            cursor = response[0].decode('utf-8') if isinstance(response[0], bytes) else response[0]
+            return cursor, self._outbox_entries(response[1])
+        except Exception as e:
+            logger.error(f"Failed to claim stale outbox jobs: {str(e)}")
+            raise
+
+    @redis_op
+    async def ack_outbox_job(self, group: str, entry_id: str):
+        """Acknowledge a settled job's stream entry"""
+        try:
+            await self.redis_client.xack(OUTBOX_STREAM, group, entry_id)
+        except Exception as e:
+            logger.error(f"Failed to ack outbox job: {str(e)}")
+            raise
+
+    @redis_op
+    async def delay_outbox_job(self, group: str, entry_id: str, job_id: str, due_at: float):
+        """Ack a job's entry and park the job until due_at (a Unix timestamp)"""
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.xack(OUTBOX_STREAM, group, entry_id)
+                pipe.zadd(OUTBOX_DELAYED, {job_id: due_at})
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to delay outbox job: {str(e)}")
+            raise
+
+    @redis_op
+    async def promote_due_outbox_jobs(self, now: float, limit: int = 100) -> int:
+        """Move delayed jobs due by now back onto the stream, returning how many moved"""
+        try:
+            return await self.redis_client.eval(
+                PROMOTE_DUE_SCRIPT, 2, OUTBOX_DELAYED, OUTBOX_STREAM, now, limit, OUTBOX_STREAM_MAXLEN
+            )
+        except Exception as e:
+            logger.error(f"Failed to promote delayed outbox jobs: {str(e)}")
+            raise
+
+    @redis_op
+    async def take_client_token(self, client_id: str, capacity: int, refill_per_second: float) -> tuple:
+        """Take a token from a client's bucket, returning (allowed, retry_after seconds)"""
+        try:
+            allowed, retry_after = await self.redis_client.eval(
+                TOKEN_BUCKET_SCRIPT, 1, f"client_bucket:{client_id}", capacity, refill_per_second
+            )
+            return bool(allowed), float(retry_after)
+        except Exception as e:
+            logger.error(f"Failed to take client token: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_or_set(self, key: str, value: str, ttl: int) -> str:
+        """Get a key's value, or set it to value for ttl seconds if missing"""
+        try:
+            existing = await self.redis_client.eval(GET_OR_SET_SCRIPT, 1, key, value, ttl)
+            return existing.decode('utf-8') if isinstance(existing, bytes) else existing
+        except Exception as e:
+            logger.error(f"Failed to get or set {key}: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_outbox_backlog(self, group: str) -> dict:
+        """Entries delivered but unacked (pending) and not yet delivered (lag) for a group"""
+        try:
+            for info in await self.redis_client.xinfo_groups(OUTBOX_STREAM):
+                if info['name'].decode('utf-8') == group:
+                    return {"pending": info['pending'], "lag": info.get('lag')}
+            return {"pending": 0, "lag": await self.redis_client.xlen(OUTBOX_STREAM)}
+        except redis.ResponseError:
+            # Stream doesn't exist yet
+            return {"pending": 0, "lag": 0}
+        except Exception as e:
+            logger.error(f"Failed to get outbox backlog: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_cached_media_id(self, media_key: str) -> str | None:
+        """Get the media id of a file uploaded earlier, if it hasn't expired"""
+        try:
+            media_id = await self.redis_client.get(f"media:id:{media_key}")
+            return media_id.decode('utf-8') if media_id else None
+        except Exception as e:
+            logger.error(f"Failed to get cached media id: {str(e)}")
+            raise
+
+    @redis_op
+    async def cache_media_id(self, media_key: str, media_id: str, ttl: int):
+        """Remember a finalized upload's media id until X expires it"""
+        try:
+            await self.redis_client.setex(f"media:id:{media_key}", ttl, media_id)
+        except Exception as e:
+            logger.error(f"Failed to cache media id: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_media_upload(self, media_key: str) -> dict | None:
+        """Get an unfinished chunked upload: its media id and the segments already appended"""
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(f"media:upload:{media_key}")
+                pipe.smembers(f"media:upload:{media_key}:segments")
+                upload, segments = await pipe.execute()
+            if not upload:
+                return None
+            upload = {k.decode('utf-8'): v.decode('utf-8') for k, v in upload.items()}
+            upload["segments"] = {int(s) for s in segments}
+            return upload
+        except Exception as e:
+            logger.error(f"Failed to get media upload: {str(e)}")
+            raise
+
+    @redis_op
+    async def start_media_upload(self, media_key: str, media_id: str, expires_at: int):
+        """Record an initialized upload so it can be resumed until expires_at"""
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(f"media:upload:{media_key}", f"media:upload:{media_key}:segments")
+                pipe.hset(f"media:upload:{media_key}", mapping={"media_id": media_id, "expires_at": expires_at})
+                pipe.expireat(f"media:upload:{media_key}", expires_at)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to start media upload: {str(e)}")
+            raise
+
+    @redis_op
+    async def mark_media_segment(self, media_key: str, segment_index: int, expires_at: int):
+        """Record that a segment of an upload was appended"""
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.sadd(f"media:upload:{media_key}:segments", segment_index)
+                pipe.expireat(f"media:upload:{media_key}:segments", expires_at)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to mark media segment: {str(e)}")
+            raise
+
+    @redis_op
+    async def clear_media_upload(self, media_key: str):
+        """Forget an upload once it is finalized or can no longer be resumed"""
+        try:
+            await self.redis_client.delete(f"media:upload:{media_key}", f"media:upload:{media_key}:segments")
+        except Exception as e:
+            logger.error(f"Failed to clear media upload: {str(e)}")
+            raise
+
+    @redis_op
+    async def store_rate_limit_state(self, resume_time: str):
+        """Store rate limit state and resume time"""
+        try:
+            await self.redis_client.setex(
+                "rate_limit_state",
+                24 * 60 * 60,  # 24 hour expiration
+                resume_time
+            )
+            logger.info(f"Stored rate limit resume time: {resume_time}")
+        except Exception as e:
+            logger.error(f"Failed to store rate limit state: {str(e)}")
+            raise
+
+    @redis_op
+    async def get_rate_limit_state(self) -> str:
+        """Get stored rate limit resume time"""
+        try:
+            resume_time = await self.redis_client.get("rate_limit_state")
+            if resume_time:
+                return resume_time.decode('utf-8')
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get rate limit state: {str(e)}")
+            return None
+
+    @redis_op
+    async def clear_rate_limit_state(self):
+        """Clear stored rate limit state"""
+        try:
+            await self.redis_client.delete("rate_limit_state")
+            logger.info("Cleared rate limit state")
+        except Exception as e:
+            logger.error(f"Failed to clear rate limit state: {str(e)}")
+            raise
+
+def get_async_redis_handler() -> AsyncRedisHandler:
+    """Get the process-wide async Redis handler"""
+    global _handler
+    if _handler is None:
+        _handler = AsyncRedisHandler()
+    return _handler
+
+async def close_async_redis():
+    """Disconnect the shared asyncio connection pool"""
+    global _pool, _handler
+    if _pool is not None:
+        await _pool.disconnect()
+        logger.info("Closed async Redis connection pool")
+    _pool = None
+    _handler = None
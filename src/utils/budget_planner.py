@@ -0,0 +1,126 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.utils.rate_limiter import get_rate_limit_tracker
+from datetime import datetime, timedelta, timezone
+import calendar
+import logging
+import math
+import pytz
+
+logger = logging.getLogger(__name__)
+
+class BudgetPlanner:
+    """Spreads the daily/monthly posting quota evenly across the posting window"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self.rate_limiter = get_rate_limit_tracker()
+        self.tz = pytz.timezone(self.settings.SCHEDULER_TIMEZONE)
+
+    def _window(self, day) -> tuple:
+        """Posting window (start, end) for a local calendar day"""
+        start = self.tz.localize(datetime(day.year, day.month, day.day, self.settings.POSTING_WINDOW_START_HOUR))
+        end = self.tz.localize(datetime(day.year, day.month, day.day, self.settings.POSTING_WINDOW_END_HOUR))
+        return start, end
+
+    def _daily_budget(self, day, posts_today: int, posts_month: int) -> int:
+        """Posts still allowed on a day given the daily cap and its share of the monthly cap"""
+        days_in_month = calendar.monthrange(day.year, day.month)[1]
+        days_left = days_in_month - day.day + 1
+        remaining_month = max(self.settings.MONTHLY_POST_QUOTA - posts_month, 0)
+        # Today's share of what's left this month, including what was already posted today
+        monthly_share = math.ceil((remaining_month + posts_today) / days_left)
+        daily_cap = min(self.settings.DAILY_POST_QUOTA, monthly_share)
+        return max(min(daily_cap - posts_today, remaining_month), 0)
+
+    def _spread(self, start: datetime, end: datetime, count: int) -> list:
+        """Place count slots at the midpoints of equal intervals across [start, end)"""
+        if count <= 0 or end <= start:
+            return []
+        min_interval = timedelta(minutes=self.settings.MIN_POST_INTERVAL_MINUTES)
+        count = min(count, max(int((end - start) / min_interval), 1))
+        interval = (end - start) / count
+        slots = []
+        for i in range(count):
+            slot = start + interval * i + interval / 2
+            # Round up to the next whole minute so slots never land in the past
+            if slot.second or slot.microsecond:
+                slot = slot.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            slots.append(self.tz.normalize(slot))
+        return slots
+
+    async def plan(self, now: datetime = None, not_before: datetime = None) -> dict:
+        """Build the slot calendar for the rest of today, or tomorrow if today is spent"""
+        now = (now or datetime.now(timezone.utc)).astimezone(self.tz)
+        earliest = max(now, not_before.astimezone(self.tz)) if not_before else now
+
+        # Respect an exhausted 24-hour window from the X API headers
+        header_remaining = None
+        header_reset = None
+        windows = await self.rate_limiter.get_windows("tweets")
+        user_window = windows.get("user_24h")
+        if user_window:
+            header_reset = datetime.fromtimestamp(user_window["reset"], tz=timezone.utc).astimezone(self.tz)
+            header_remaining = user_window["remaining"]
+            if header_remaining <= 0:
+                earliest = max(earliest, header_reset)
+
+        day = earliest.date()
+        for _ in range(2):
+            start, end = self._window(day)
+            posts_today, posts_month = await self.redis_handler.get_post_counts(
+                day.isoformat(), day.strftime("%Y-%m")
+            )
+            budget = self._daily_budget(day, posts_today, posts_month)
+            if header_remaining is not None and header_remaining > 0 and header_reset >= end:
+                budget = min(budget, header_remaining)
+
+            slots = self._spread(max(start, earliest), end, budget)
+            if slots:
+                break
+            day += timedelta(days=1)
+
+        plan = {
+            "day": day.isoformat(),
+            "window_start": start.isoformat(),
+            "window_end": end.isoformat(),
+            "posts_today": posts_today,
+            "posts_this_month": posts_month,
+            "daily_quota": self.settings.DAILY_POST_QUOTA,
+            "monthly_quota": self.settings.MONTHLY_POST_QUOTA,
+            "budget": len(slots),
+            "slots": slots,
+        }
+        logger.info(f"Planned {len(slots)} slots for {day}: {[s.strftime('%H:%M') for s in slots]}")
+        return plan
+
+    async def budget_left(self, now: datetime = None) -> int:
+        """Posts still allowed today, at any time of day"""
+        day = (now or datetime.now(timezone.utc)).astimezone(self.tz).date()
+        posts_today, posts_month = await self.redis_handler.get_post_counts(day.isoformat(), day.strftime("%Y-%m"))
+        return self._daily_budget(day, posts_today, posts_month)
+
+    def next_day_start(self, now: datetime = None) -> datetime:
+        """Local midnight starting the next budget day"""
+        tomorrow = (now or datetime.now(timezone.utc)).astimezone(self.tz).date() + timedelta(days=1)
+        return self.tz.localize(datetime(tomorrow.year, tomorrow.month, tomorrow.day))
+
+    async def next_slot(self, now: datetime = None, not_before: datetime = None) -> datetime:
+        """Get the next slot to post at"""
+        plan = await self.plan(now=now, not_before=not_before)
+        return plan["slots"][0] if plan["slots"] else None
+
+    async def record_post(self, posted_at: datetime = None):
+        """Count a post against today's and this month's budget"""
+        posted_at = (posted_at or datetime.now(timezone.utc)).astimezone(self.tz)
+        await self.redis_handler.record_post(posted_at.date().isoformat(), posted_at.strftime("%Y-%m"))
+
+_planner: BudgetPlanner | None = None
+
+def get_budget_planner() -> BudgetPlanner:
+    """Get the process-wide budget planner"""
+    global _planner
+    if _planner is None:
+        _planner = BudgetPlanner()
+    return _planner
@@ -0,0 +1,131 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.bot.token_manager import get_token_manager
+from src.utils.leader_election import get_leader_elector
+from src.utils.resilience import breaker_states
+from src.utils.scheduler import get_scheduler
+from src.utils.outbox import CONSUMER_GROUP
+from src.utils.metrics import TWEET_BUFFER_DEPTH, OUTBOX_PENDING, OUTBOX_LAG
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class HealthMonitor:
+    """Refreshes a health snapshot in the background so probes never touch Redis
+
+    Readiness needs Redis and a running scheduler; missing tokens are
+    reported but don't fail it, so /auth/twitter stays reachable before setup.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self.snapshot = None
+        self._refreshed_at = 0.0
+        self._task = None
+
+    async def _check_redis(self) -> dict:
+        started = time.monotonic()
+        try:
+            connected = await self.redis_handler.verify_connection()
+        except Exception:
+            connected = False
+        return {"connected": connected, "latency_ms": round((time.monotonic() - started) * 1000, 2)}
+
+    async def _check_tokens(self) -> dict:
+        try:
+            # Served from the token manager's cache; Redis is read only on a miss
+            tokens = await get_token_manager().get_tokens()
+        except Exception:
+            tokens = None
+        if not tokens:
+            return {"present": False, "expires_in": None}
+        expires_at = tokens.get('expires_at')
+        return {
+            "present": True,
+            "expires_in": round(float(expires_at) - time.time()) if expires_at is not None else None,
+        }
+
+    async def _check_queues(self) -> dict:
+        """Buffer and outbox depth, also exported as gauges"""
+        try:
+            buffered = await self.redis_handler.get_tweet_buffer_length()
+            backlog = await self.redis_handler.get_outbox_backlog(CONSUMER_GROUP)
+        except Exception:
+            return {"tweet_buffer": None, "outbox_pending": None, "outbox_lag": None}
+        TWEET_BUFFER_DEPTH.set(buffered)
+        OUTBOX_PENDING.set(backlog["pending"])
+        if backlog["lag"] is not None:
+            OUTBOX_LAG.set(backlog["lag"])
+        return {"tweet_buffer": buffered, "outbox_pending": backlog["pending"], "outbox_lag": backlog["lag"]}
+
+    async def refresh(self):
+        """Rebuild the snapshot"""
+        redis_status = await self._check_redis()
+        tokens = await self._check_tokens()
+        queues = await self._check_queues() if redis_status["connected"] else {}
+        elector = get_leader_elector()
+        scheduler = get_scheduler()
+        next_run = await scheduler.get_next_run_time()
+        scheduler_running = await scheduler.is_running()
+
+        self.snapshot = {
+            "ready": redis_status["connected"] and scheduler_running,
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "redis": redis_status,
+            "tokens": tokens,
+            "scheduler": {
+                "running": scheduler_running,
+                "next_run": next_run.strftime("%Y-%m-%d %H:%M:%S %Z") if next_run else None,
+            },
+            "queues": queues,
+            "leader": {"worker_id": elector.worker_id, "is_leader": elector.is_leader},
+            "circuit_breakers": breaker_states(),
+        }
+        self._refreshed_at = time.monotonic()
+
+    def is_ready(self) -> bool:
+        """Whether the latest snapshot is ready and recent enough to trust"""
+        if self.snapshot is None:
+            return False
+        age = time.monotonic() - self._refreshed_at
+        return self.snapshot["ready"] and age < self.settings.HEALTH_CHECK_INTERVAL * 3
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health check failed: {str(e)}")
+            # Re-check quickly until ready so a cold start doesn't wait a full interval
+            ready = self.snapshot is not None and self.snapshot["ready"]
+            await asyncio.sleep(self.settings.HEALTH_CHECK_INTERVAL if ready else min(1.0, self.settings.HEALTH_CHECK_INTERVAL))
+
+    def start(self):
+        """Start refreshing the snapshot in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop refreshing the snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+_monitor: HealthMonitor | None = None
+
+def get_health_monitor() -> HealthMonitor:
+    """Get the process-wide health monitor"""
+    global _monitor
+    if _monitor is None:
+        _monitor = HealthMonitor()
+    return _monitor
@@ -0,0 +1,58 @@
+from collections import deque
+import asyncio
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Rolling window of recent call latencies"""
+
+    def __init__(self, window: int = 100, min_samples: int = 10):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        """Latency at percentile p (0-100), or None until enough samples exist"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(math.ceil(p / 100 * len(ordered)) - 1, len(ordered) - 1)
+        return ordered[max(index, 0)]
+
+async def hedged(call, hedge_delay: float, tracker: LatencyTracker = None):
+    """Run call(); if it hasn't finished after hedge_delay, race a second call
+
+    The first successful result wins and the other attempt is cancelled. An
+    attempt that fails doesn't end the race while the other is still running.
+    """
+    async def timed():
+        started = time.monotonic()
+        result = await call()
+        if tracker is not None:
+            tracker.record(time.monotonic() - started)
+        return result
+
+    pending = {asyncio.create_task(timed())}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+        if done:
+            return done.pop().result()
+
+        logger.info(f"Primary request slower than {hedge_delay:.2f}s - Sending hedge request")
+        pending.add(asyncio.create_task(timed()))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
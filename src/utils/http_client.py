@@ -0,0 +1,72 @@
+import httpx
+from src.config.settings import get_settings
+from src.utils.resilience import RetryPolicy, UpstreamError, call_with_resilience
+from src.utils.metrics import X_API_LATENCY
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled async HTTP client for the X API"""
+    global _client
+    if _client is None or _client.is_closed:
+        settings = get_settings()
+        _client = httpx.AsyncClient(
+            http2=settings.HTTP2_ENABLED,
+            timeout=httpx.Timeout(
+                settings.HTTP_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info(f"Created pooled HTTP client (http2={settings.HTTP2_ENABLED})")
+    return _client
+
+async def _request(method: str, url: str, **kwargs) -> httpx.Response:
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = await get_http_client().request(method, url, **kwargs)
+        status = str(response.status_code)
+    finally:
+        X_API_LATENCY.labels(httpx.URL(url).path, status).observe(time.perf_counter() - started)
+    if response.status_code >= 500:
+        raise UpstreamError(
+            f"X API error {response.status_code}: {response.text}",
+            status_code=response.status_code
+        )
+    return response
+
+def _not_sent(error: Exception) -> bool:
+    """Whether a request failed before any of it reached X"""
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+async def x_api_post(url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+    """POST to the X API through the "x_api" breaker, retrying 5xx and network errors
+
+    Other statuses (401, 429, ...) are returned for the caller to handle.
+    Pass idempotent=False for requests that mustn't be repeated (creating a
+    tweet, spending a refresh token): those are only retried when the
+    connection failed, since a 5xx or read timeout may follow a success.
+    """
+    policy = None if idempotent else RetryPolicy(retry_on=_not_sent)
+    return await call_with_resilience("x_api", _request, "POST", url, policy=policy, **kwargs)
+
+async def x_api_get(url: str, **kwargs) -> httpx.Response:
+    """GET from the X API, with the same retries and breaker as x_api_post"""
+    return await call_with_resilience("x_api", _request, "GET", url, **kwargs)
+
+async def close_http_client():
+    """Close the shared HTTP client and release pooled connections"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Closed pooled HTTP client")
+    _client = None
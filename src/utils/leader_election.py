@@ -0,0 +1,144 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class LeaderElector:
+    """Redis lease so only one worker runs scheduled posts
+
+    The lease expires after LEADER_LEASE_TTL unless renewed, so a follower
+    takes over within one TTL plus one renew interval of the leader dying.
+    Every acquisition increments a fencing token; the leader re-checks it
+    before side effects so a paused former leader can't post.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.fencing_token = None
+        self._lease_expires_at = 0.0
+        self._task = None
+        self._listeners = []
+
+    @property
+    def ttl_ms(self) -> int:
+        return int(self.settings.LEADER_LEASE_TTL * 1000)
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this worker holds an unexpired lease, judged by the local clock"""
+        if not self.settings.LEADER_ELECTION_ENABLED:
+            return True
+        return self.fencing_token is not None and time.monotonic() < self._lease_expires_at
+
+    def add_listener(self, callback):
+        """Register an async callback(is_leader) for leadership changes"""
+        self._listeners.append(callback)
+
+    async def _notify(self, is_leader: bool):
+        for callback in self._listeners:
+            try:
+                await callback(is_leader)
+            except Exception as e:
+                logger.error(f"Leadership listener failed: {str(e)}")
+
+    async def _lose_leadership(self):
+        logger.warning(f"Lost scheduler leadership (token {self.fencing_token})")
+        self.fencing_token = None
+        await self._notify(False)
+
+    async def _tick(self):
+        """Renew the lease if held, otherwise try to take it"""
+        started = time.monotonic()
+        if self.fencing_token is not None:
+            try:
+                renewed = await self.redis_handler.renew_leader_lease(self.worker_id, self.ttl_ms)
+            except Exception:
+                # Once the lease has lapsed another worker may hold it, reachable or not
+                if started >= self._lease_expires_at:
+                    await self._lose_leadership()
+                raise
+            if renewed:
+                self._lease_expires_at = started + self.settings.LEADER_LEASE_TTL
+                return
+            await self._lose_leadership()
+
+        token = await self.redis_handler.acquire_leader_lease(self.worker_id, self.ttl_ms)
+        if token is not None:
+            self.fencing_token = token
+            self._lease_expires_at = started + self.settings.LEADER_LEASE_TTL
+            logger.info(f"Acquired scheduler leadership as {self.worker_id} (token {token})")
+            await self._notify(True)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Leader election tick failed: {str(e)}")
+            await asyncio.sleep(self.settings.LEADER_LEASE_TTL / 3)
+
+    async def validate(self) -> bool:
+        """Confirm in Redis that we still lead with our fencing token before a side effect"""
+        if not self.settings.LEADER_ELECTION_ENABLED:
+            return True
+        if not self.is_leader:
+            return False
+        leader, token = await self.redis_handler.get_leader_lease()
+        return leader == self.worker_id and token == self.fencing_token
+
+    async def status(self) -> dict:
+        """Leadership details for status endpoints"""
+        if not self.settings.LEADER_ELECTION_ENABLED:
+            return {"enabled": False, "worker_id": self.worker_id, "is_leader": True}
+        leader, token = await self.redis_handler.get_leader_lease()
+        return {
+            "enabled": True,
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "leader": leader,
+            "fencing_token": token,
+        }
+
+    def start(self):
+        """Start campaigning for leadership in the background"""
+        if not self.settings.LEADER_ELECTION_ENABLED:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Leader election started for {self.worker_id}")
+
+    async def stop(self):
+        """Stop campaigning and hand the lease over immediately"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.fencing_token is not None:
+            try:
+                await self.redis_handler.release_leader_lease(self.worker_id)
+                logger.info("Released scheduler leadership")
+            except Exception:
+                pass
+            self.fencing_token = None
+
+_elector: LeaderElector | None = None
+
+def get_leader_elector() -> LeaderElector:
+    """Get the process-wide leader elector"""
+    global _elector
+    if _elector is None:
+        _elector = LeaderElector()
+    return _elector
@@ -0,0 +1,165 @@
+from src.config.settings import get_settings
+from src.utils.metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+from contextlib import contextmanager
+from collections import deque
+from datetime import datetime, timezone
+import traceback
+import threading
+import asyncio
+import logging
+import weakref
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+# What each task is doing ("GET /health", "job:<id>", "slot:<time>"); read by the watchdog thread
+_task_labels = weakref.WeakKeyDictionary()
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+def set_task_label(label: str):
+    """Name what the current task is doing for the rest of its life, for stall reports"""
+    task = _current_task()
+    if task is not None:
+        _task_labels[task] = label
+
+@contextmanager
+def task_label(label: str):
+    """Name what the current task is doing inside the block, for stall reports"""
+    task = _current_task()
+    if task is None:
+        yield
+        return
+    previous = _task_labels.get(task)
+    _task_labels[task] = label
+    try:
+        yield
+    finally:
+        if previous is None:
+            _task_labels.pop(task, None)
+        else:
+            _task_labels[task] = previous
+
+class LoopWatchdog:
+    """Measures event-loop lag and captures what blocked the loop
+
+    A heartbeat coroutine sleeps LOOP_WATCHDOG_INTERVAL and records how late
+    it woke up. A daemon thread watches the heartbeat; once it is more than
+    LOOP_STALL_THRESHOLD overdue, the thread grabs the loop thread's stack
+    and the running task while the blocking call is still on it. The report
+    is logged when the loop comes back, with the stall's full duration.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.recent = deque(maxlen=20)
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = None
+        self._stall = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._task = None
+        self._thread = None
+
+    def _describe_task(self) -> dict | None:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        coro = task.get_coro()
+        return {
+            "name": task.get_name(),
+            "coroutine": getattr(coro, "__qualname__", repr(coro)),
+            "label": _task_labels.get(task),
+        }
+
+    def _capture(self, overdue: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stall = {
+            "detected_at": datetime.now(timezone.utc).isoformat(),
+            "overdue_seconds": round(overdue, 3),
+            "task": self._describe_task(),
+            "stack": traceback.format_stack(frame, limit=40) if frame is not None else [],
+        }
+        with self._lock:
+            if self._stall is None:
+                self._stall = stall
+
+    def _watch(self):
+        """Watchdog thread: capture the loop's stack while it is blocked"""
+        threshold = self.settings.LOOP_WATCHDOG_INTERVAL + self.settings.LOOP_STALL_THRESHOLD
+        poll = min(self.settings.LOOP_WATCHDOG_INTERVAL, self.settings.LOOP_STALL_THRESHOLD / 2)
+        captured_beat = None
+        while not self._stopped.wait(poll):
+            beat = self._last_beat
+            overdue = time.monotonic() - beat
+            # One capture per stall, taken as soon as it crosses the threshold
+            if overdue > threshold and beat != captured_beat:
+                captured_beat = beat
+                self._capture(overdue - self.settings.LOOP_WATCHDOG_INTERVAL)
+
+    def _report(self, stall: dict, lag: float):
+        stall["lag_seconds"] = round(lag, 3)
+        self.recent.append(stall)
+        EVENT_LOOP_STALLS.inc()
+        task = stall["task"] or {}
+        culprit = task.get("label") or task.get("coroutine") or "a callback outside any task"
+        logger.warning(
+            f"Event loop blocked for {lag * 1000:.0f}ms in {culprit}\n" + "".join(stall["stack"]),
+            extra={"loop_stall": {k: v for k, v in stall.items() if k != "stack"}}
+        )
+
+    async def _heartbeat(self):
+        interval = self.settings.LOOP_WATCHDOG_INTERVAL
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(now - expected, 0)
+            EVENT_LOOP_LAG.observe(lag)
+            with self._lock:
+                stall, self._stall = self._stall, None
+            if stall is not None:
+                self._report(stall, lag)
+
+    def start(self):
+        """Start the heartbeat and watchdog thread on the running loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (stall threshold {self.settings.LOOP_STALL_THRESHOLD * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop the heartbeat and watchdog thread"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+_watchdog: LoopWatchdog | None = None
+
+def get_loop_watchdog() -> LoopWatchdog:
+    """Get the process-wide loop watchdog"""
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = LoopWatchdog()
+    return _watchdog
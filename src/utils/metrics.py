@@ -0,0 +1,60 @@
+from prometheus_client import Counter, Gauge, Histogram
+from functools import wraps
+import time
+
+# Latency buckets from sub-millisecond Redis calls up to a slow generation
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+ANTHROPIC_LATENCY = Histogram(
+    "anthropic_request_seconds",
+    "Anthropic request latency, including retries",
+    ["mode"],
+    buckets=LATENCY_BUCKETS
+)
+ANTHROPIC_TOKENS = Histogram(
+    "anthropic_tokens",
+    "Tokens per Anthropic response",
+    ["kind"],
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+)
+X_API_LATENCY = Histogram(
+    "x_api_request_seconds",
+    "X API request latency per attempt",
+    ["path", "status"],
+    buckets=LATENCY_BUCKETS
+)
+REDIS_OP_LATENCY = Histogram(
+    "redis_op_seconds",
+    "Redis handler call latency",
+    ["method"],
+    buckets=LATENCY_BUCKETS
+)
+SLOT_LAG = Histogram(
+    "scheduler_slot_lag_seconds",
+    "Delay between a slot's planned time and when it fired",
+    buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+)
+TWEET_BUFFER_DEPTH = Gauge("tweet_buffer_depth", "Drafts waiting in the tweet buffer")
+OUTBOX_PENDING = Gauge("outbox_pending_jobs", "Outbox jobs delivered to a worker but not yet acked")
+OUTBOX_LAG = Gauge("outbox_lag_jobs", "Outbox jobs not yet delivered to any worker")
+STARTUP_PHASE_SECONDS = Gauge("startup_phase_seconds", "Time spent in each startup phase", ["phase"])
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop watchdog's heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+EVENT_LOOP_STALLS = Counter("event_loop_stalls_total", "Times the event loop was blocked past LOOP_STALL_THRESHOLD")
+TOKEN_REFRESHES = Counter("token_refreshes_total", "Token refresh attempts", ["result"])
+
+def timed(histogram):
+    """Decorator recording an async function's latency in a histogram child"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
@@ -0,0 +1,219 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.utils.rate_limiter import RateLimited
+from src.utils.resilience import CircuitOpenError
+from src.utils.budget_planner import get_budget_planner
+from src.bot.token_manager import MissingTokensError
+from datetime import datetime, timezone
+import asyncio
+import logging
+import json
+import random
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+POSTED = "posted"
+FAILED = "failed"
+
+# Consumer group shared by every worker reading the outbox stream
+CONSUMER_GROUP = "tweet-workers"
+
+class TweetOutbox:
+    """Durable queue of tweet posts with at-least-once delivery
+
+    A job is written to Redis (idempotency key, job hash and stream entry
+    in one script) before the request returns, so an accepted post survives
+    a crash. Workers in src.worker read the stream through a consumer group
+    and call process(); entries left unacked longer than
+    OUTBOX_VISIBILITY_TIMEOUT are claimed by another worker. A failed job is
+    parked in a sorted set until its backoff delay passes; outages (open
+    breaker, missing tokens, rate limits) don't count as attempts.
+
+    The daily budget is checked again before each post: jobs queued while
+    X was down would otherwise all post at once when it recovers, past
+    DAILY_POST_QUOTA. A job over budget waits for the next day.
+
+    A job's content is saved before posting, so a redelivered job posts the
+    same text, and a job already marked posted is never posted again. The
+    idempotency key only dedupes submissions: X has no idempotency key for
+    creating tweets, so a crash after X accepts a post but before the job is
+    marked posted still posts it twice.
+    """
+
+    def __init__(self, twitter_bot=None, tweet_buffer=None, media_uploader=None):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self._twitter_bot = twitter_bot
+        self._tweet_buffer = tweet_buffer
+        self._media_uploader = media_uploader
+        self.planner = get_budget_planner()
+
+    @property
+    def twitter_bot(self):
+        if self._twitter_bot is None:
+            from src.bot.twitter_bot import TwitterBot
+            self._twitter_bot = TwitterBot()
+        return self._twitter_bot
+
+    @property
+    def media_uploader(self):
+        if self._media_uploader is None:
+            from src.bot.media_uploader import get_media_uploader
+            self._media_uploader = get_media_uploader()
+        return self._media_uploader
+
+    @property
+    def tweet_buffer(self):
+        if self._tweet_buffer is None:
+            from src.utils.tweet_buffer import get_tweet_buffer
+            self._tweet_buffer = get_tweet_buffer()
+        return self._tweet_buffer
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def _retry_delay(self, error: Exception, attempts: int) -> float:
+        """Seconds to wait before a failed job runs again"""
+        if isinstance(error, RateLimited):
+            return max((error.reset_at - datetime.now(timezone.utc)).total_seconds(), 0)
+        if isinstance(error, CircuitOpenError):
+            return error.retry_after
+        if isinstance(error, MissingTokensError):
+            return self.settings.OUTBOX_RETRY_MAX_DELAY
+        # Exponential with jitter, so jobs that failed together don't retry together
+        cap = min(self.settings.OUTBOX_RETRY_MAX_DELAY, self.settings.OUTBOX_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+        return random.uniform(cap / 2, cap)
+
+    async def _retry_later(self, entry_id: str, job_id: str, delay: float, fields: dict):
+        retry_at = time.time() + delay
+        await self.redis_handler.update_outbox_job(job_id, {
+            **fields,
+            "status": PENDING,
+            "retry_at": datetime.fromtimestamp(retry_at, timezone.utc).isoformat(),
+            "updated_at": self._now(),
+        })
+        await self.redis_handler.delay_outbox_job(CONSUMER_GROUP, entry_id, job_id, retry_at)
+
+    async def submit(self, content: str = None, idempotency_key: str = None, attachments: list = None) -> dict:
+        """Queue a post and return its job; a repeated idempotency key returns the original job
+
+        attachments are file names in MEDIA_DIR, uploaded when the job is posted.
+        """
+        job_id = uuid.uuid4().hex
+        existing_id = await self.redis_handler.submit_outbox_job(
+            job_id,
+            idempotency_key or job_id,
+            content,
+            self._now(),
+            self.settings.OUTBOX_IDEMPOTENCY_TTL,
+            attachments
+        )
+        if existing_id != job_id:
+            logger.info(f"Idempotency key {idempotency_key} already used by job {existing_id}")
+        else:
+            logger.info(f"Queued outbox job {job_id}")
+        return await self.get_job(existing_id)
+
+    async def get_job(self, job_id: str) -> dict:
+        """Get a job's status, or None if it doesn't exist or has expired"""
+        job = await self.redis_handler.get_outbox_job(job_id)
+        if job is not None:
+            job['attachments'] = json.loads(job.get('attachments') or "[]")
+        return job
+
+    async def process(self, entry_id: str, job_id: str):
+        """Post one delivered job and ack or requeue its stream entry"""
+        job = await self.redis_handler.get_outbox_job(job_id)
+        if job is None:
+            logger.warning(f"Outbox job {job_id} expired before it was posted")
+            await self.redis_handler.ack_outbox_job(CONSUMER_GROUP, entry_id)
+            return
+        if job['status'] in (POSTED, FAILED):
+            # Redelivered after it was already settled
+            await self.redis_handler.ack_outbox_job(CONSUMER_GROUP, entry_id)
+            return
+
+        if await self.planner.budget_left() <= 0:
+            # Posts are only counted once made, so recheck here rather than trusting the check at queue time
+            delay = (self.planner.next_day_start() - datetime.now(timezone.utc)).total_seconds()
+            logger.warning(f"Daily post budget used - Outbox job {job_id} deferred {delay:.0f}s")
+            await self._retry_later(entry_id, job_id, delay + random.uniform(0, 60), {
+                "error": "Daily post budget used",
+            })
+            return
+
+        attempts = int(job.get('attempts', 0)) + 1
+        await self.redis_handler.update_outbox_job(job_id, {
+            "status": IN_FLIGHT,
+            "attempts": attempts,
+            "updated_at": self._now(),
+        })
+
+        uploads = None
+        try:
+            # Upload attachments while the text is taken from the buffer or generated
+            attachments = json.loads(job.get('attachments') or "[]")
+            if attachments:
+                uploads = asyncio.create_task(self.media_uploader.upload_all(attachments))
+
+            content = job.get('content')
+            if not content:
+                content = await self.tweet_buffer.pop()
+                await self.redis_handler.update_outbox_job(job_id, {"content": content})
+
+            media_ids = await uploads if uploads else None
+            tweet_id = await self.twitter_bot.post_tweet(content, media_ids=media_ids)
+            await self.redis_handler.update_outbox_job(job_id, {
+                "status": POSTED,
+                "tweet_id": tweet_id,
+                "error": "",
+                "updated_at": self._now(),
+            })
+            await self.redis_handler.ack_outbox_job(CONSUMER_GROUP, entry_id)
+            logger.info(f"Outbox job {job_id} posted as tweet {tweet_id}")
+        except RateLimited as e:
+            # Not the job's fault - wait for the reset without spending an attempt
+            await self._retry_later(entry_id, job_id, self._retry_delay(e, attempts), {
+                "attempts": attempts - 1,
+                "error": str(e),
+            })
+            raise
+        except (CircuitOpenError, MissingTokensError) as e:
+            # An outage or missing auth, not a problem with this job - don't spend an attempt
+            delay = self._retry_delay(e, attempts)
+            logger.warning(f"Outbox job {job_id} deferred {delay:.0f}s: {str(e)}")
+            await self._retry_later(entry_id, job_id, delay, {
+                "attempts": attempts - 1,
+                "error": str(e),
+            })
+        except Exception as e:
+            if attempts >= self.settings.OUTBOX_MAX_ATTEMPTS:
+                logger.error(f"Outbox job {job_id} failed after {attempts} attempts: {str(e)}")
+                await self.redis_handler.update_outbox_job(job_id, {
+                    "status": FAILED,
+                    "error": str(e),
+                    "updated_at": self._now(),
+                })
+                await self.redis_handler.ack_outbox_job(CONSUMER_GROUP, entry_id)
+            else:
+                delay = self._retry_delay(e, attempts)
+                logger.warning(f"Outbox job {job_id} attempt {attempts} failed - Retrying in {delay:.0f}s: {str(e)}")
+                await self._retry_later(entry_id, job_id, delay, {"error": str(e)})
+        finally:
+            # Gave up before the upload finished; appended segments are kept so a retry resumes
+            if uploads is not None and not uploads.done():
+                uploads.cancel()
+
+_outbox: TweetOutbox | None = None
+
+def get_tweet_outbox() -> TweetOutbox:
+    """Get the process-wide tweet outbox"""
+    global _outbox
+    if _outbox is None:
+        _outbox = TweetOutbox()
+    return _outbox
@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+class SamplingProfiler:
+    """Samples every thread's stack from a background thread via sys._current_frames
+
+    Nothing is hooked into the profiled code, so overhead is one stack walk
+    per thread per interval and it can run against a live process.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._frames = []
+        self._frame_index = {}
+        self._profiles = {}
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_filename, code.co_name, code.co_firstlineno)
+        if key not in self._frame_index:
+            self._frame_index[key] = len(self._frames)
+            self._frames.append({
+                "name": code.co_name,
+                "file": code.co_filename,
+                "line": code.co_firstlineno,
+            })
+        return self._frame_index[key]
+
+    def _sample(self, weight: float, thread_names: dict, own_thread: int):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            profile = self._profiles.setdefault(thread_id, {
+                "name": thread_names.get(thread_id, str(thread_id)),
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(stack)
+            profile["weights"].append(weight)
+
+    def run(self, seconds: float) -> dict:
+        """Sample for the given number of seconds and return a speedscope profile"""
+        own_thread = threading.get_ident()
+        started = last = time.perf_counter()
+        deadline = started + seconds
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            self._sample(now - last, thread_names, own_thread)
+            last = now
+            if now >= deadline:
+                break
+        return self.to_speedscope(last - started)
+
+    def to_speedscope(self, duration: float) -> dict:
+        """Profile in speedscope's file format (https://www.speedscope.app)"""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"pid {os.getpid()} at {datetime.now(timezone.utc).isoformat()}",
+            "exporter": "city-farmers-bot",
+            "shared": {"frames": self._frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": profile["name"],
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": duration,
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for profile in self._profiles.values()
+            ],
+        }
+
+class AllocationTracker:
+    """tracemalloc snapshots diffed against a baseline, to find growth between two points"""
+
+    # Allocations made by the tracking machinery itself
+    IGNORED = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, linecache.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+
+    def __init__(self):
+        self._baseline = None
+        self._baseline_at = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self.IGNORED)
+
+    def start(self, frames: int = 10) -> dict:
+        """Start tracing (if needed) and take the baseline snapshot"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = self._snapshot()
+        self._baseline_at = datetime.now(timezone.utc).isoformat()
+        return self.status()
+
+    def diff(self, limit: int = 25, group_by: str = "lineno", reset: bool = False) -> dict:
+        """Largest allocation changes since the baseline"""
+        if self._baseline is None or not tracemalloc.is_tracing():
+            raise Exception("Allocation tracking not started")
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self._baseline, group_by)
+        result = {
+            "baseline_at": self._baseline_at,
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+            "size_diff": sum(stat.size_diff for stat in stats),
+            "top": [
+                {
+                    "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "size": stat.size,
+                    "size_diff": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+        if reset:
+            self._baseline = snapshot
+            self._baseline_at = result["taken_at"]
+        return result
+
+    def stop(self) -> dict:
+        """Stop tracing and drop the baseline"""
+        tracemalloc.stop()
+        self._baseline = None
+        self._baseline_at = None
+        return self.status()
+
+    def status(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "baseline_at": self._baseline_at,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+        }
+
+_allocation_tracker: AllocationTracker | None = None
+
+def get_allocation_tracker() -> AllocationTracker:
+    """Get the process-wide allocation tracker"""
+    global _allocation_tracker
+    if _allocation_tracker is None:
+        _allocation_tracker = AllocationTracker()
+    return _allocation_tracker
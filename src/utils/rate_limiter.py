@@ -0,0 +1,122 @@
+from src.utils.async_redis_handler import get_async_redis_handler
+from datetime import datetime, timedelta, timezone
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Header prefixes for each X API rate-limit window
+RATE_LIMIT_WINDOWS = {
+    "window": "x-rate-limit",
+    "user_24h": "x-user-limit-24hour",
+    "app_24h": "x-app-limit-24hour",
+}
+
+# Used when a 429 carries no usable reset header
+DEFAULT_RATE_LIMIT_WAIT = timedelta(minutes=15)
+
+class RateLimited(Exception):
+    """Raised when an X API rate-limit window is exhausted"""
+
+    def __init__(self, reset_at: datetime, endpoint: str = None, window: str = None):
+        self.reset_at = reset_at
+        self.endpoint = endpoint
+        self.window = window
+        super().__init__(f"Rate limited on {endpoint or 'X API'} ({window or 'unknown'} window) until {reset_at.isoformat()}")
+
+class RateLimitTracker:
+    """Tracks X API rate-limit windows from response headers and persists them in Redis"""
+
+    def __init__(self):
+        self.redis_handler = get_async_redis_handler()
+        self._windows = {}
+
+    @staticmethod
+    def parse_headers(headers) -> dict:
+        """Extract limit/remaining/reset for every window present in the headers"""
+        windows = {}
+        for name, prefix in RATE_LIMIT_WINDOWS.items():
+            try:
+                reset = headers.get(f"{prefix}-reset")
+                remaining = headers.get(f"{prefix}-remaining")
+                if reset is None or remaining is None:
+                    continue
+                limit = headers.get(f"{prefix}-limit")
+                windows[name] = {
+                    "limit": int(limit) if limit is not None else None,
+                    "remaining": int(remaining),
+                    "reset": int(reset),
+                }
+            except ValueError:
+                logger.warning(f"Malformed {prefix} rate-limit headers")
+        return windows
+
+    async def record(self, endpoint: str, headers):
+        """Persist the windows reported by an X API response"""
+        windows = self.parse_headers(headers)
+        for name, window in windows.items():
+            self._windows[(endpoint, name)] = window
+            try:
+                await self.redis_handler.store_rate_limit_window(endpoint, name, window)
+            except Exception as e:
+                logger.error(f"Failed to persist {name} rate-limit window: {str(e)}")
+        return windows
+
+    async def get_windows(self, endpoint: str) -> dict:
+        """Get the current windows for an endpoint, from memory or Redis"""
+        now = time.time()
+        windows = {}
+        for name in RATE_LIMIT_WINDOWS:
+            window = self._windows.get((endpoint, name))
+            if window is None or window["reset"] <= now:
+                try:
+                    window = await self.redis_handler.get_rate_limit_window(endpoint, name)
+                except Exception as e:
+                    logger.error(f"Failed to load {name} rate-limit window: {str(e)}")
+                    window = None
+                if window:
+                    self._windows[(endpoint, name)] = window
+            if window and window["reset"] > now:
+                windows[name] = window
+        return windows
+
+    def _exhausted(self, endpoint: str, windows: dict) -> RateLimited | None:
+        """Build a RateLimited for the exhausted window that resets last"""
+        exhausted = [
+            (name, w) for name, w in windows.items()
+            if w["remaining"] <= 0 and w["reset"] > time.time()
+        ]
+        if not exhausted:
+            return None
+        name, window = max(exhausted, key=lambda item: item[1]["reset"])
+        reset_at = datetime.fromtimestamp(window["reset"], tz=timezone.utc)
+        return RateLimited(reset_at, endpoint=endpoint, window=name)
+
+    async def check(self, endpoint: str):
+        """Raise RateLimited before calling an endpoint whose quota is known to be spent"""
+        error = self._exhausted(endpoint, await self.get_windows(endpoint))
+        if error:
+            raise error
+
+    async def error_from_response(self, endpoint: str, response) -> RateLimited:
+        """Build a RateLimited for a 429 response"""
+        windows = await self.record(endpoint, response.headers)
+        error = self._exhausted(endpoint, windows)
+        if error:
+            return error
+
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            reset_at = datetime.now(timezone.utc) + timedelta(seconds=int(retry_after))
+        else:
+            reset_at = datetime.now(timezone.utc) + DEFAULT_RATE_LIMIT_WAIT
+        return RateLimited(reset_at, endpoint=endpoint)
+
+_tracker: RateLimitTracker | None = None
+
+def get_rate_limit_tracker() -> RateLimitTracker:
+    """Get the process-wide rate-limit tracker"""
+    global _tracker
+    if _tracker is None:
+        _tracker = RateLimitTracker()
+    return _tracker
@@ -1,14 +1,31 @@
 import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 from src.config.settings import get_settings
+from functools import lru_cache
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+@lru_cache()
+def get_connection_pool() -> redis.ConnectionPool:
+    """Process-wide Redis connection pool shared by every handler"""
+    settings = get_settings()
+    return redis.ConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        retry=Retry(ExponentialBackoff(), settings.REDIS_RETRY_ATTEMPTS),
+        retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+    )
+
 class RedisHandler:
-    def __init__(self):
+    def __init__(self, connection_pool: redis.ConnectionPool = None):
         self.settings = get_settings()
-        self.redis_client = redis.from_url(self.settings.REDIS_URL)
+        self.redis_client = redis.Redis(connection_pool=connection_pool or get_connection_pool())
     
     def store_twitter_tokens(self, user_id: str, tokens: dict):
         """Store Twitter OAuth tokens in Redis"""
@@ -114,4 +131,9 @@ class RedisHandler:
             logger.info("Cleared rate limit state")
         except Exception as e:
             logger.error(f"Failed to clear rate limit state: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+@lru_cache()
+def get_redis_handler() -> RedisHandler:
+    """Get the process-wide Redis handler"""
+    return RedisHandler()
@@ -0,0 +1,175 @@
+from src.config.settings import get_settings
+from functools import wraps
+import asyncio
+import httpx
+import logging
+import random
+import redis
+import time
+
+logger = logging.getLogger(__name__)
+
+class UpstreamError(Exception):
+    """Non-success HTTP response from an upstream API"""
+
+    def __init__(self, message: str, status_code: int = None):
+        self.status_code = status_code
+        super().__init__(message)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open - retry in {retry_after:.1f}s")
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None,
+                 retry_on=None):
+        settings = get_settings()
+        self.max_attempts = max_attempts if max_attempts is not None else settings.RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else settings.RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else settings.RETRY_MAX_DELAY
+        # Narrows which transient errors are retried, e.g. for calls that aren't safe to repeat
+        self.retry_on = retry_on
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = None, recovery_timeout: float = None):
+        settings = get_settings()
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.BREAKER_FAILURE_THRESHOLD
+        self.recovery_timeout = recovery_timeout or settings.BREAKER_RECOVERY_TIMEOUT
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = None
+        self._probe_in_flight = False
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.recovery_timeout:
+                raise CircuitOpenError(self.name, self.recovery_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            logger.info(f"Circuit '{self.name}' half-open - probing upstream")
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(self.name, self.recovery_timeout)
+            self._probe_in_flight = True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: Exception):
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that neither proved nor disproved upstream health"""
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+_breakers: dict = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide breaker for an upstream"""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+def breaker_states() -> dict:
+    """State of every upstream breaker, for health reporting"""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an error is transient: 429, 5xx, timeouts and connection failures"""
+    # Imported here to avoid a cycle: the rate limiter uses the Redis handler, which uses this module
+    from src.utils.rate_limiter import RateLimited
+    
+    if isinstance(error, (CircuitOpenError, RateLimited)):
+        return False
+    if isinstance(error, UpstreamError):
+        return error.status_code == 429 or (error.status_code or 0) >= 500
+    if type(error).__module__.startswith("anthropic"):
+        # Only anthropic's own errors need the SDK, which is slow to import
+        import anthropic
+        if isinstance(error, anthropic.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        if isinstance(error, (anthropic.APITimeoutError, anthropic.APIConnectionError)):
+            return True
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+        return True
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+async def call_with_resilience(name: str, func, *args, policy: RetryPolicy = None, **kwargs):
+    """Call an upstream through its circuit breaker, retrying transient errors with backoff
+
+    Only transient errors count against the breaker; a 4xx means the
+    upstream is up and answering.
+    """
+    policy = policy or RetryPolicy()
+    breaker = get_breaker(name)
+    for attempt in range(policy.max_attempts):
+        breaker.allow()
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure(e)
+            if attempt == policy.max_attempts - 1 or (policy.retry_on and not policy.retry_on(e)):
+                raise
+            delay = policy.backoff(attempt)
+            logger.warning(f"{name} call failed ({str(e) or type(e).__name__}) - Retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+def resilient(name: str, max_attempts: int = None):
+    """Decorator form of call_with_resilience for async methods"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await call_with_resilience(
+                name, func, *args, policy=RetryPolicy(max_attempts=max_attempts), **kwargs
+            )
+        return wrapper
+    return decorator
@@ -1,175 +1,328 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from src.bot.twitter_bot import TwitterBot
-from src.bot.content_generator import ContentGenerator
+from apscheduler.schedulers.base import STATE_STOPPED
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.jobstores.redis import RedisJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.events import EVENT_JOB_MISSED
+from src.config.settings import get_settings
 import pytz
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from src.utils.redis_handler import RedisHandler
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.utils.redis_handler import get_connection_pool
+from src.utils.outbox import get_tweet_outbox
+from src.utils.rate_limiter import RateLimited, get_rate_limit_tracker
+from src.utils.budget_planner import get_budget_planner
+from src.utils.leader_election import get_leader_elector
+from src.utils.metrics import SLOT_LAG
+from src.utils.structured_logging import correlation_id
+from src.utils.loop_watchdog import set_task_label
 
 logger = logging.getLogger(__name__)
 
+_active_scheduler = None
+
+class _LoopSafeExecutor(AsyncIOExecutor):
+    """AsyncIOExecutor that can be handed jobs from outside the event loop thread"""
+
+    def _do_submit_job(self, job, run_times):
+        self._eventloop.call_soon_threadsafe(super()._do_submit_job, job, run_times)
+
+class _ThreadedJobStoreScheduler(AsyncIOScheduler):
+    """AsyncIOScheduler whose job store work runs in a worker thread
+
+    The stock scheduler wakes up on the event loop and reads, updates and
+    removes due jobs there; with RedisJobStore every wakeup blocks the loop
+    on synchronous Redis calls. Here each wakeup runs _process_jobs in the
+    loop's default executor, and due coroutine jobs are handed back to the
+    loop to run.
+    """
+
+    _processing = None
+    _wakeup_pending = False
+
+    def wakeup(self):
+        self._eventloop.call_soon_threadsafe(self._wakeup)
+
+    def _wakeup(self):
+        self._stop_timer()
+        if self._processing is not None:
+            # Jobs were added while a pass was running; go again once it ends
+            self._wakeup_pending = True
+            return
+        self._processing = self._eventloop.run_in_executor(None, self._process_jobs)
+        self._processing.add_done_callback(self._processed)
+
+    def _processed(self, future):
+        self._processing = None
+        if self.state == STATE_STOPPED:
+            return
+        if self._wakeup_pending:
+            self._wakeup_pending = False
+            self._wakeup()
+            return
+        try:
+            wait_seconds = future.result()
+        except Exception as e:
+            logger.error(f"Failed to process scheduled jobs: {str(e)}")
+            wait_seconds = self.jobstore_retry_interval
+        self._start_timer(wait_seconds)
+
+    def _create_default_executor(self):
+        return _LoopSafeExecutor()
+
+async def run_scheduled_post(slot: str = None):
+    """Job entry point, referenced by name so persisted jobs survive restarts"""
+    await _active_scheduler.post_scheduled_tweet(slot)
+
+async def run_replan():
+    """Job entry point for re-planning when no slot was available"""
+    await _active_scheduler._schedule_next()
+
+async def run_fallback_replan():
+    """Job entry point for retrying a re-plan that failed, e.g. while Redis was down"""
+    await _active_scheduler._replan_or_retry()
+
 class TweetScheduler:
     def __init__(self):
-        self.scheduler = AsyncIOScheduler(timezone=pytz.timezone('America/Chicago'))
-        self.content_generator = ContentGenerator()
-        self.twitter_bot = TwitterBot()
-
-    def _calculate_next_slot_after_wait(self, current_time: datetime) -> datetime:
-        """Calculate the next available slot after a 24-hour wait period"""
-        # Calculate minimum resume time (24 hours from now)
-        min_resume_time = current_time + timedelta(days=1)
-        
-        # Find next scheduled hour after the 24-hour wait
-        scheduled_hours = [9, 12, 14, 16, 19]
-        min_hour = min_resume_time.hour
-        next_hour = next((h for h in scheduled_hours if h > min_hour), scheduled_hours[0])
-        
-        # If no remaining slots today, move to next day
-        resume_time = min_resume_time
-        if next_hour <= min_hour:
-            resume_time += timedelta(days=1)
-            next_hour = scheduled_hours[0]
-        
-        return resume_time.replace(hour=next_hour, minute=0, second=0, microsecond=0)
-
-    async def _handle_rate_limit_reschedule(self, current_time: datetime):
+        global _active_scheduler
+        self.settings = get_settings()
+        self.tz = pytz.timezone(self.settings.SCHEDULER_TIMEZONE)
+        # Fallback re-plans must be schedulable while Redis is down
+        jobstores = {"fallback": MemoryJobStore()}
+        if self.settings.SCHEDULER_JOBSTORE == "redis":
+            jobstores["default"] = RedisJobStore(
+                jobs_key="apscheduler.jobs",
+                run_times_key="apscheduler.run_times",
+                connection_pool=get_connection_pool()
+            )
+        self.scheduler = _ThreadedJobStoreScheduler(
+            timezone=self.tz,
+            jobstores=jobstores,
+            job_defaults={
+                "misfire_grace_time": self.settings.SCHEDULER_MISFIRE_GRACE_TIME,
+                "coalesce": self.settings.SCHEDULER_COALESCE,
+                "max_instances": 1
+            }
+        )
+        self.outbox = get_tweet_outbox()
+        self.rate_limiter = get_rate_limit_tracker()
+        self.redis_handler = get_async_redis_handler()
+        self.planner = get_budget_planner()
+        self.leader = get_leader_elector()
+        self._loop = None
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
+        _active_scheduler = self
+
+    async def _schedule_next(self, not_before: datetime = None):
+        """Re-plan the remaining budget and schedule the next slot"""
+        next_slot = await self.planner.next_slot(not_before=not_before)
+        if next_slot is None:
+            # Budget spent for today and tomorrow - check again when the next window opens
+            tomorrow = datetime.now(self.tz).date() + timedelta(days=1)
+            next_slot = self.tz.localize(datetime(
+                tomorrow.year, tomorrow.month, tomorrow.day,
+                self.settings.POSTING_WINDOW_START_HOUR
+            ))
+            logger.warning(f"No posting budget left - Re-planning at {next_slot}")
+            trigger_job, kwargs = run_replan, {}
+        else:
+            trigger_job, kwargs = run_scheduled_post, {"slot": next_slot.isoformat()}
+
+        # The Redis job store is synchronous, so its calls run off the event loop
+        job = await asyncio.to_thread(
+            self.scheduler.add_job,
+            trigger_job,
+            DateTrigger(run_date=next_slot, timezone=self.tz),
+            kwargs=kwargs,
+            id="tweet_scheduler",
+            name="Post scheduled tweets",
+            replace_existing=True
+        )
+        logger.info(f"Next scheduled run: {next_slot}")
+        return job
+
+    def _schedule_fallback(self, run_at: datetime):
+        """Schedule a re-plan in the in-memory store so the posting chain survives a Redis outage"""
+        self.scheduler.add_job(
+            run_fallback_replan,
+            DateTrigger(run_date=run_at, timezone=self.tz),
+            id="tweet_scheduler_fallback",
+            name="Retry scheduling",
+            jobstore="fallback",
+            replace_existing=True
+        )
+        logger.warning(f"Re-planning again at {run_at}")
+
+    async def _replan_or_retry(self, not_before: datetime = None):
+        """Schedule the next slot, or a fallback re-plan if that fails"""
+        try:
+            await self._schedule_next(not_before=not_before)
+        except Exception as e:
+            logger.error(f"Failed to schedule next slot: {str(e)}")
+            retry_at = max(
+                not_before or datetime.now(self.tz),
+                datetime.now(self.tz) + timedelta(minutes=self.settings.MIN_POST_INTERVAL_MINUTES)
+            )
+            self._schedule_fallback(retry_at)
+
+    def _on_job_missed(self, event):
+        """A slot past the misfire grace time is dropped without running; plan a new one"""
+        if event.job_id != "tweet_scheduler" or self._loop is None:
+            return
+        logger.warning(f"Scheduled slot {event.scheduled_run_time} was missed - Re-planning")
+        # Listeners may run outside the loop thread
+        asyncio.run_coroutine_threadsafe(self._replan_missed(), self._loop)
+
+    async def _replan_missed(self):
+        await self._replan_or_retry()
+
+    async def _handle_rate_limit_reschedule(self, reset_at: datetime):
         """Common logic for handling rate limit rescheduling"""
         try:
-            # Remove current job
-            logger.info("Removing current schedule...")
-            self.scheduler.remove_job('tweet_scheduler')
-            logger.info("Current schedule removed successfully")
-            
-            # Calculate resume times
-            min_resume_time = current_time + timedelta(days=1)
-            resume_time = self._calculate_next_slot_after_wait(current_time)
-            
+            current_time = datetime.now(self.tz)
             logger.info(f"Current time: {current_time}")
-            logger.info(f"24-hour minimum wait until: {min_resume_time}")
-            logger.info(f"Next scheduled slot after wait: {resume_time}")
-            
+            logger.info(f"Rate limit resets at: {reset_at}")
+
             # Store rate limit state in Redis
-            self.redis_handler = RedisHandler()
-            self.redis_handler.store_rate_limit_state(resume_time.isoformat())
-            
-            # Reschedule for next available slot after 24-hour wait
+            await self.redis_handler.store_rate_limit_state(reset_at.isoformat())
+
+            # Re-plan the budget from the reset onward
             logger.info("Creating new schedule...")
-            self.scheduler.add_job(
-                self.post_scheduled_tweet,
-                CronTrigger(
-                    year=resume_time.year,
-                    month=resume_time.month,
-                    day=resume_time.day,
-                    hour="9,12,14,16,19",
-                    minute="0",
-                    timezone='America/Chicago'
-                ),
-                id="tweet_scheduler",
-                name="Post scheduled tweets"
-            )
-            logger.info(f"New schedule created successfully")
-            logger.info(f"Tweets will resume at: {resume_time}")
+            job = await self._schedule_next(not_before=reset_at)
+            logger.info(f"Tweets will resume at: {job.next_run_time}")
             logger.info("=== Rescheduling Complete ===")
         except Exception as e:
             logger.error(f"Failed to handle rate limit reschedule: {str(e)}")
             raise
 
-    async def post_scheduled_tweet(self):
-        """Post tweet with rotating content types"""
+    async def post_scheduled_tweet(self, slot: str = None):
+        """Queue a tweet for a worker to post, then re-plan the remaining budget"""
         try:
+            if slot:
+                correlation_id.set(f"slot:{slot}")
+                set_task_label(f"slot:{slot}")
             logger.info("=== Scheduler Triggered ===")
-            logger.info("Attempting to post scheduled tweet...")
-            
-            # Generate content without specifying type
-            content = await self.content_generator.generate_tweet()
-            logger.info(f"Generated content: {content}")
-            
-            # Post to Twitter
-            await self.twitter_bot.post_tweet(content)
-            logger.info("Tweet posted successfully")
-            
-        except Exception as e:
-            if "Too Many Requests" in str(e):
-                logger.warning("=== Rate Limit Handler ===")
-                logger.warning("Rate limit detected - Waiting 24 hours before next scheduled slot")
-                
-                try:
-                    current_time = datetime.now(pytz.timezone('America/Chicago'))
-                    await self._handle_rate_limit_reschedule(current_time)
-                except Exception as reschedule_error:
-                    logger.error(f"Failed to reschedule: {str(reschedule_error)}")
-                    logger.exception("Rescheduling error traceback:")
-                    raise
-            else:
-                logger.error("=== Scheduler Error ===")
-                logger.error(f"Failed to post scheduled tweet: {str(e)}")
-                logger.exception("Error traceback:")
+            if slot:
+                SLOT_LAG.observe(max((datetime.now(self.tz) - datetime.fromisoformat(slot)).total_seconds(), 0))
+            # Only the lease holder posts; followers keep planning so they can take over
+            if not await self.leader.validate():
+                logger.info("Not the scheduler leader - Skipping slot")
+                await self._schedule_next()
+                return
+
+            logger.info("Queueing scheduled tweet...")
+
+            # Manual posts may have used up the budget since this slot was planned
+            plan = await self.planner.plan()
+            if plan["day"] != datetime.now(self.tz).date().isoformat():
+                logger.info("Posting budget for today already used - Skipping slot")
+                await self._schedule_next()
+                return
+
+            # Don't queue into an exhausted window; re-plan from its reset instead
+            await self.rate_limiter.check("tweets")
+
+            # Keyed by slot so a re-run of the same slot doesn't post twice
+            slot = slot or datetime.now(self.tz).replace(second=0, microsecond=0).isoformat()
+            job = await self.outbox.submit(idempotency_key=f"slot:{slot}")
+            logger.info(f"Scheduled tweet queued as job {job['id']}")
+
+            await self._schedule_next()
+        except RateLimited as e:
+            logger.warning("=== Rate Limit Handler ===")
+            logger.warning(f"Rate limit detected - Resuming after reset at {e.reset_at}")
+
+            try:
+                await self._handle_rate_limit_reschedule(e.reset_at)
+            except Exception as reschedule_error:
+                logger.error(f"Failed to reschedule: {str(reschedule_error)}")
+                logger.exception("Rescheduling error traceback:")
+                self._schedule_fallback(max(e.reset_at, datetime.now(self.tz)))
                 raise
+        except Exception as e:
+            logger.error("=== Scheduler Error ===")
+            logger.error(f"Failed to queue scheduled tweet: {str(e)}")
+            logger.exception("Error traceback:")
+            # Keep the schedule alive for the next slot, even if re-planning fails too
+            retry_after = datetime.now(self.tz) + timedelta(minutes=self.settings.MIN_POST_INTERVAL_MINUTES)
+            await self._replan_or_retry(not_before=retry_after)
+            raise
 
-    async def handle_rate_limit(self):
+    async def handle_rate_limit(self, reset_at: datetime = None):
         """Handle rate limit from external trigger"""
         logger.warning("=== External Rate Limit Handler ===")
-        logger.warning("Rate limit reported - Waiting 24 hours before next scheduled slot")
-        
+        if reset_at is None:
+            # Reset time unknown - fall back to waiting a full day
+            reset_at = datetime.now(self.tz) + timedelta(days=1)
+        logger.warning(f"Rate limit reported - Resuming after reset at {reset_at}")
+
         try:
-            current_time = datetime.now(pytz.timezone('America/Chicago'))
-            await self._handle_rate_limit_reschedule(current_time)
+            await self._handle_rate_limit_reschedule(reset_at)
         except Exception as reschedule_error:
             logger.error(f"Failed to reschedule: {str(reschedule_error)}")
             logger.exception("Rescheduling error traceback:")
             raise
 
-    def start(self):
-        """Start the scheduler with defined jobs"""
+    async def get_plan(self) -> dict:
+        """Current slot calendar from the budget planner"""
+        not_before = None
+        stored_resume_time = await self.redis_handler.get_rate_limit_state()
+        if stored_resume_time:
+            not_before = datetime.fromisoformat(stored_resume_time)
+        return await self.planner.plan(not_before=not_before)
+
+    async def _on_leadership_change(self, is_leader: bool):
+        """Resume the persisted schedule when elected, pause it when demoted"""
+        if not is_leader:
+            logger.info("Pausing scheduler - Not the leader")
+            self.scheduler.pause()
+            return
+
+        job = await self._get_job()
+        grace = timedelta(seconds=self.settings.SCHEDULER_MISFIRE_GRACE_TIME)
+        if job and job.next_run_time < datetime.now(self.tz) - grace:
+            # Too late to run; APScheduler would drop it and leave nothing scheduled
+            logger.warning(f"Persisted slot {job.next_run_time} is past the misfire grace time - Re-planning")
+            await self._schedule_next()
+        elif job:
+            # Warm restart or failover - keep the persisted plan
+            logger.info(f"Restored persisted schedule - Next run at: {job.next_run_time}")
+        else:
+            logger.info("Creating initial schedule...")
+            current_time = datetime.now(self.tz)
+            logger.info(f"Current time (CT): {current_time}")
+
+            # Check for stored rate limit state
+            not_before = None
+            stored_resume_time = await self.redis_handler.get_rate_limit_state()
+            if stored_resume_time:
+                resume_time = datetime.fromisoformat(stored_resume_time)
+                if resume_time > current_time:
+                    logger.info(f"Found stored rate limit state. Waiting until: {resume_time}")
+                    not_before = resume_time
+
+            await self._schedule_next(not_before=not_before)
+            logger.info("Initial schedule created")
+
+        # Jobs that misfired within the grace time run once on resume
+        self.scheduler.resume()
+
+    async def start(self):
+        """Start the scheduler; jobs only run while this worker leads"""
         try:
             if not self.scheduler.running:
                 logger.info("=== Starting Scheduler ===")
-                logger.info("Creating initial schedule...")
-                
-                # Check for stored rate limit state
-                self.redis_handler = RedisHandler()
-                stored_resume_time = self.redis_handler.get_rate_limit_state()
-                
-                if stored_resume_time:
-                    resume_time = datetime.fromisoformat(stored_resume_time)
-                    current_time = datetime.now(pytz.timezone('America/Chicago'))
-                    
-                    if resume_time > current_time:
-                        logger.info(f"Found stored rate limit state. Waiting until: {resume_time}")
-                        self.scheduler.start()
-                        self.scheduler.add_job(
-                            self.post_scheduled_tweet,
-                            CronTrigger(
-                                year=resume_time.year,
-                                month=resume_time.month,
-                                day=resume_time.day,
-                                hour="9,12,14,16,19",
-                                minute="0",
-                                timezone='America/Chicago'
-                            ),
-                            id="tweet_scheduler",
-                            name="Post scheduled tweets"
-                        )
-                        return
-                
-                # Normal startup if no rate limit state
-                current_time = datetime.now(pytz.timezone('America/Chicago'))
-                logger.info(f"Current time (CT): {current_time}")
-                
-                self.scheduler.start()
-                
-                job = self.scheduler.add_job(
-                    self.post_scheduled_tweet,
-                    CronTrigger(hour="9,12,14,16,19", minute="0", timezone='America/Chicago'),
-                    id="tweet_scheduler",
-                    name="Post scheduled tweets"
-                )
-                
-                if job and hasattr(job, 'next_run_time'):
-                    logger.info(f"Next scheduled run: {job.next_run_time}")
-                
-                logger.info("Initial schedule created")
+                self._loop = asyncio.get_running_loop()
+                self.scheduler.start(paused=True)
+                self.leader.add_listener(self._on_leadership_change)
+                if self.leader.is_leader:
+                    await self._on_leadership_change(True)
+                else:
+                    logger.info("Waiting for scheduler leadership")
+
                 logger.info("Scheduler started successfully")
                 logger.info("=== Startup Complete ===")
         except Exception as e:
@@ -178,22 +331,24 @@ class TweetScheduler:
             logger.exception("Startup error traceback:")
             raise
 
-    def shutdown(self):
-        """Handle shutdown request"""
+    async def shutdown(self):
+        """Stop the scheduler; pending jobs stay in the job store for the next boot"""
         if not self.scheduler.running:
             return
-            
-        if self.get_next_run_time():
-            # Silently preserve
-            return
-            
-        logger.info("No pending jobs - shutting down scheduler")
-        self.scheduler.shutdown()
 
-    def get_next_run_time(self):
+        job = await self._get_job()
+        if job:
+            logger.info(f"Persisting schedule - Next run at: {job.next_run_time}")
+        self.scheduler.shutdown(wait=False)
+
+    async def _get_job(self):
+        """The posting job, looked up in a thread since the Redis job store blocks"""
+        return await asyncio.to_thread(self.scheduler.get_job, 'tweet_scheduler')
+
+    async def get_next_run_time(self):
         """Get the next scheduled run time"""
         try:
-            job = self.scheduler.get_job('tweet_scheduler')
+            job = await self._get_job()
             if job:
                 return job.next_run_time
             return None
@@ -201,6 +356,12 @@ class TweetScheduler:
             logger.error(f"Failed to get next run time: {str(e)}")
             return None
 
-    def is_running(self):
+    async def is_running(self):
         """Check if scheduler is running"""
-        return self.scheduler.running and self.scheduler.get_job('tweet_scheduler') is not None
\ No newline at end of file
+        return self.scheduler.running and await self.get_next_run_time() is not None
+
+def get_scheduler() -> TweetScheduler:
+    """Get the process-wide tweet scheduler, built on first use"""
+    if _active_scheduler is None:
+        TweetScheduler()
+    return _active_scheduler
@@ -0,0 +1,53 @@
+from src.utils.metrics import STARTUP_PHASE_SECONDS
+from contextlib import contextmanager
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """Time spent in each startup phase, measured from when the report is created"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.total = None
+        self._last_mark = self.started
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds * 1000, 2)
+        STARTUP_PHASE_SECONDS.labels(name).set(seconds)
+
+    def mark(self, name: str):
+        """Record the time since the previous mark as a phase"""
+        now = time.perf_counter()
+        self.record(name, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+            self._last_mark = time.perf_counter()
+
+    def finish(self):
+        """Close the report once the app can serve requests"""
+        self.total = round((time.perf_counter() - self.started) * 1000, 2)
+        STARTUP_PHASE_SECONDS.labels("total").set(self.total / 1000)
+        breakdown = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases.items())
+        logger.info(f"Ready to serve in {self.total:.0f}ms ({breakdown})")
+
+    def as_dict(self) -> dict:
+        return {"total_ms": self.total, "phases_ms": self.phases}
+
+_report: StartupReport | None = None
+
+def get_startup_report() -> StartupReport:
+    """Get the process-wide startup report, created (and timed from) on first call"""
+    global _report
+    if _report is None:
+        _report = StartupReport()
+    return _report
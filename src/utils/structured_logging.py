@@ -0,0 +1,220 @@
+from src.utils.loop_watchdog import task_label
+from logging.handlers import QueueHandler, QueueListener
+from contextvars import ContextVar
+from collections.abc import Mapping
+from datetime import datetime, timezone
+import threading
+import atexit
+import logging
+import random
+import queue
+import json
+import time
+import copy
+import uuid
+import sys
+import re
+
+# Set per request by the correlation-id middleware and per job by the outbox worker
+correlation_id: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+
+REDACTED = "[REDACTED]"
+SENSITIVE_KEYS = {
+    "authorization", "access_token", "refresh_token", "token", "code_verifier",
+    "client_secret", "api_key", "x-api-key", "cookie", "set-cookie", "password",
+}
+# Secrets that reach a message already formatted, e.g. through an f-string
+SENSITIVE_PATTERNS = [
+    (re.compile(r"(Bearer|Basic)\s+[A-Za-z0-9\-._~+/=]+", re.IGNORECASE), r"\1 " + REDACTED),
+    (re.compile(r"""(['"]?(?:access_token|refresh_token|client_secret|code_verifier|api_key)['"]?\s*[:=]\s*)(['"]?)[^'"\s,&}]+\2""", re.IGNORECASE), r"\1\2" + REDACTED + r"\2"),
+    (re.compile(r"sk-ant-[A-Za-z0-9\-_]+"), REDACTED),
+]
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "correlation_id", "color_message"}
+
+def redact(value, depth: int = 0):
+    """Copy of value with sensitive mapping keys replaced; other values are returned as-is"""
+    if depth > 4:
+        return value
+    if isinstance(value, Mapping):
+        return {
+            k: REDACTED if isinstance(k, str) and k.lower() in SENSITIVE_KEYS else redact(v, depth + 1)
+            for k, v in value.items()
+        }
+    if type(value) in (list, tuple):
+        return type(value)(redact(v, depth + 1) for v in value)
+    return value
+
+def redact_text(text: str) -> str:
+    for pattern, replacement in SENSITIVE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+class RedactingQueueHandler(QueueHandler):
+    """Hands records to the listener thread without formatting them
+
+    The stock QueueHandler formats the message and traceback on the calling
+    thread. Here the caller only redacts structured args and stamps the
+    correlation id; message interpolation, traceback rendering, JSON encoding
+    and stream I/O all happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.args:
+            record.args = redact(record.args)
+        record.correlation_id = correlation_id.get()
+        return record
+
+class _RedactingFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        return redact_text(super().formatMessage(record))
+
+    def formatException(self, ei) -> str:
+        return redact_text(super().formatException(ei))
+
+class TextFormatter(_RedactingFormatter):
+    """Plain-text lines with the correlation id, for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(correlation_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "correlation_id", None) is None:
+            record.correlation_id = "-"
+        return super().format(record)
+
+class JsonFormatter(_RedactingFormatter):
+    """One JSON object per line; fields passed through extra= are included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact_text(record.getMessage()),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = redact(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+class CorrelationIdMiddleware:
+    """Tags every log line of a request with its X-Request-ID, generating one if absent
+
+    The route is also recorded for the loop watchdog's stall reports.
+
+    Plain ASGI rather than @app.middleware("http"), which adds a task and
+    stream per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next((v for k, v in scope["headers"] if k == b"x-request-id"), b"")[:64] or uuid.uuid4().hex.encode()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id)]
+            await send(message)
+
+        token = correlation_id.set(request_id.decode("latin-1"))
+        try:
+            with task_label(f"{scope['method']} {scope['path']}"):
+                await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
+
+class PayloadSampler:
+    """Lets through the first per_minute payload logs per key each minute, then a random sample
+
+    Suppressed calls are counted and reported on the next one let through.
+    """
+
+    def __init__(self, per_minute: int, sample_rate: float):
+        self.per_minute = per_minute
+        self.sample_rate = sample_rate
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> tuple[bool, int]:
+        """Whether to log this call, and how many were suppressed since the last one logged"""
+        window = int(time.monotonic() // 60)
+        with self._lock:
+            started, count, suppressed = self._windows.get(key, (window, 0, 0))
+            if started != window:
+                started, count = window, 0
+            count += 1
+            if count <= self.per_minute or random.random() < self.sample_rate:
+                self._windows[key] = (started, count, 0)
+                return True, suppressed
+            self._windows[key] = (started, count, suppressed + 1)
+            return False, 0
+
+_sampler: PayloadSampler | None = None
+_listener: QueueListener | None = None
+
+def log_payload(logger: logging.Logger, key: str, msg: str, *args, level: int = logging.DEBUG, **kwargs):
+    """Log a verbose payload (request/response bodies, drafts), rate limited per key
+
+    Arguments are only interpolated on the listener thread, and not at all
+    when the level is disabled or the call is sampled out.
+    """
+    if _sampler is None or not logger.isEnabledFor(level):
+        return
+    allowed, suppressed = _sampler.allow(key)
+    if not allowed:
+        return
+    if suppressed:
+        msg = f"{msg} ({suppressed} similar suppressed)"
+    logger.log(level, msg, *args, stacklevel=2, **kwargs)
+
+def configure_logging(settings):
+    """Route all logging through a queue drained by a background thread
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _sampler, _listener
+    if _listener is not None:
+        return _listener
+
+    _sampler = PayloadSampler(settings.LOG_PAYLOAD_PER_MINUTE, settings.LOG_PAYLOAD_SAMPLE_RATE)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(RedactingQueueHandler(log_queue))
+    root.setLevel(settings.LOG_LEVEL)
+    # uvicorn installs its own synchronous stderr handlers; send its records through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,155 @@
+from src.config.settings import get_settings
+from src.bot.content_generator import ContentGenerator
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.utils.leader_election import get_leader_elector
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# Last resort when the buffer is empty and live generation misses its deadline
+CANNED_TWEETS = [
+    "Spent the morning recalibrating pH sensors that were fine. They're still fine. Now I know for sure.",
+    "Nutrient film running smooth today. Nothing to report, which is the best thing a greenhouse can tell you.",
+    "Root zone temps holding steady. Quiet days in the greenhouse are underrated.",
+    "Pulled the yield data for the week. The bubble tech rack keeps outperforming and I keep being surprised by it.",
+]
+
+class TweetBuffer:
+    """Keeps ready-to-post tweets in Redis so posting doesn't wait on generation"""
+
+    def __init__(self, content_generator: ContentGenerator = None):
+        self.settings = get_settings()
+        self.content_generator = content_generator or ContentGenerator()
+        self.redis_handler = get_async_redis_handler()
+        self._refill_task = None
+        self._pending_refill = None
+        self._refill_lock = asyncio.Lock()
+
+    def _is_stale(self, draft: dict) -> bool:
+        """Check if a draft is older than the configured max age"""
+        created_at = datetime.fromisoformat(draft['created_at'])
+        max_age = timedelta(hours=self.settings.TWEET_BUFFER_MAX_AGE_HOURS)
+        return datetime.now(timezone.utc) - created_at > max_age
+
+    async def refill(self):
+        """Top the buffer up to the high watermark once it drops below the low watermark"""
+        async with self._refill_lock:
+            try:
+                length = await self.redis_handler.get_tweet_buffer_length()
+                if length >= self.settings.TWEET_BUFFER_LOW_WATERMARK:
+                    return
+
+                needed = self.settings.TWEET_BUFFER_HIGH_WATERMARK - length
+                logger.info(f"Refilling tweet buffer: {length} buffered, generating {needed}")
+                # One request for the whole refill instead of one per draft
+                drafts = await self.content_generator.generate_batch(needed)
+                created_at = datetime.now(timezone.utc).isoformat()
+                await self.redis_handler.push_tweet_drafts([
+                    {"content": content, "created_at": created_at}
+                    for content in drafts
+                ])
+                logger.info("Tweet buffer refilled")
+            except Exception as e:
+                logger.error(f"Failed to refill tweet buffer: {str(e)}")
+
+    def schedule_refill(self):
+        """Refill in the background without blocking the caller"""
+        if self._pending_refill is None or self._pending_refill.done():
+            self._pending_refill = asyncio.create_task(self.refill())
+
+    async def _refill_loop(self):
+        while True:
+            # Only the scheduler leader keeps the shared buffer topped up
+            if get_leader_elector().is_leader:
+                await self.refill()
+            await asyncio.sleep(self.settings.TWEET_BUFFER_REFILL_INTERVAL)
+
+    def start(self):
+        """Start the background refill task"""
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill_loop())
+            logger.info("Tweet buffer refill task started")
+
+    async def stop(self):
+        """Stop the background refill task"""
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+            logger.info("Tweet buffer refill task stopped")
+
+    async def _pop_fresh(self) -> str | None:
+        """Pop the oldest draft that hasn't gone stale"""
+        try:
+            while True:
+                draft = await self.redis_handler.pop_tweet_draft()
+                if draft is None:
+                    return None
+                if self._is_stale(draft):
+                    logger.info("Discarding stale tweet draft")
+                    continue
+                return draft['content']
+        except Exception as e:
+            logger.error(f"Failed to read tweet buffer: {str(e)}")
+            return None
+
+    async def _pick_canned(self) -> str:
+        """A canned tweet that wasn't among the last ones posted"""
+        try:
+            recent = await self.redis_handler.get_recent_canned_tweets()
+        except Exception as e:
+            logger.error(f"Failed to read recent canned tweets: {str(e)}")
+            recent = []
+        content = random.choice([t for t in CANNED_TWEETS if t not in recent] or CANNED_TWEETS)
+        try:
+            # Every canned tweet but one is blocked, so the same text never posts twice in a row
+            await self.redis_handler.record_canned_tweet(content, keep=len(CANNED_TWEETS) - 1)
+        except Exception as e:
+            logger.error(f"Failed to record canned tweet: {str(e)}")
+        return content
+
+    async def pop(self) -> str:
+        """Get a ready-to-post tweet, falling back to live generation when empty
+
+        Live generation is hedged and bounded by GENERATION_DEADLINE; past the
+        deadline we take whatever the refill has buffered meanwhile, then a
+        canned draft, so a slot is never missed on one slow completion. Other
+        generation errors are raised so the caller retries the post later.
+        """
+        content = await self._pop_fresh()
+        self.schedule_refill()
+        if content is not None:
+            return content
+
+        logger.warning("Tweet buffer empty - generating content live")
+        try:
+            return await asyncio.wait_for(
+                self.content_generator.generate_tweet_hedged(),
+                timeout=self.settings.GENERATION_DEADLINE
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Live generation missed its {self.settings.GENERATION_DEADLINE}s deadline")
+        except Exception as e:
+            logger.error(f"Live generation failed: {str(e)}")
+            raise
+
+        content = await self._pop_fresh()
+        if content is not None:
+            return content
+        logger.warning("Falling back to canned tweet")
+        return await self._pick_canned()
+
+_tweet_buffer: TweetBuffer | None = None
+
+def get_tweet_buffer() -> TweetBuffer:
+    """Get the process-wide tweet buffer"""
+    global _tweet_buffer
+    if _tweet_buffer is None:
+        _tweet_buffer = TweetBuffer()
+    return _tweet_buffer
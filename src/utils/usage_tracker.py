@@ -0,0 +1,95 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler
+from src.utils.metrics import ANTHROPIC_TOKENS
+from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = [
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+]
+
+class UsageTracker:
+    """Records Anthropic token usage per day and derives cost and cache-hit stats"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+
+    async def record(self, usage, estimated: bool = False):
+        """Record the usage block of one Anthropic response
+
+        estimated marks output_tokens as an estimate, for streams cancelled
+        before the API reported the final count.
+        """
+        try:
+            day = datetime.now(timezone.utc).date().isoformat()
+            counts = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+            for field, count in counts.items():
+                ANTHROPIC_TOKENS.labels(field).observe(count)
+            await self.redis_handler.record_anthropic_usage(day, {**counts, "estimated_requests": int(estimated)})
+        except Exception as e:
+            # Accounting must never fail a generation
+            logger.error(f"Failed to record token usage: {str(e)}")
+
+    def _cost(self, usage: dict) -> float:
+        """Cost in USD of a day's usage"""
+        per_token = 1 / 1_000_000
+        return round(
+            usage.get("input_tokens", 0) * self.settings.ANTHROPIC_INPUT_COST_PER_MTOK * per_token
+            + usage.get("output_tokens", 0) * self.settings.ANTHROPIC_OUTPUT_COST_PER_MTOK * per_token
+            + usage.get("cache_creation_input_tokens", 0) * self.settings.ANTHROPIC_CACHE_WRITE_COST_PER_MTOK * per_token
+            + usage.get("cache_read_input_tokens", 0) * self.settings.ANTHROPIC_CACHE_READ_COST_PER_MTOK * per_token,
+            6
+        )
+
+    @staticmethod
+    def _cache_hit_rate(usage: dict) -> float:
+        """Share of prompt tokens served from the cache"""
+        prompt_tokens = (
+            usage.get("input_tokens", 0)
+            + usage.get("cache_read_input_tokens", 0)
+            + usage.get("cache_creation_input_tokens", 0)
+        )
+        if not prompt_tokens:
+            return 0.0
+        return round(usage.get("cache_read_input_tokens", 0) / prompt_tokens, 4)
+
+    async def stats(self, days: int = 7) -> dict:
+        """Per-day usage, cost and cache-hit rate for the last N days"""
+        today = datetime.now(timezone.utc).date()
+        daily = []
+        for offset in range(days):
+            day = (today - timedelta(days=offset)).isoformat()
+            usage = await self.redis_handler.get_anthropic_usage(day)
+            daily.append({
+                "day": day,
+                "requests": usage.get("requests", 0),
+                "estimated_requests": usage.get("estimated_requests", 0),
+                **{field: usage.get(field, 0) for field in USAGE_FIELDS},
+                "cost_usd": self._cost(usage),
+                "cache_hit_rate": self._cache_hit_rate(usage),
+            })
+
+        totals = {field: sum(d[field] for d in daily) for field in ["requests", "estimated_requests", *USAGE_FIELDS]}
+        return {
+            "days": daily,
+            "total": {
+                **totals,
+                "cost_usd": self._cost(totals),
+                "cache_hit_rate": self._cache_hit_rate(totals),
+            },
+        }
+
+_tracker: UsageTracker | None = None
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the process-wide usage tracker"""
+    global _tracker
+    if _tracker is None:
+        _tracker = UsageTracker()
+    return _tracker
@@ -0,0 +1,199 @@
+from src.config.settings import get_settings
+from src.utils.async_redis_handler import get_async_redis_handler, close_async_redis
+from src.utils.http_client import close_http_client
+from src.utils.anthropic_client import close_anthropic_client
+from src.utils.outbox import CONSUMER_GROUP, get_tweet_outbox
+from src.utils.rate_limiter import RateLimited
+from src.bot.token_manager import get_token_manager
+from src.utils.structured_logging import configure_logging, correlation_id, stop_logging
+from src.utils.loop_watchdog import get_loop_watchdog, set_task_label
+from datetime import datetime, timezone
+from collections import deque
+from prometheus_client import start_http_server
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for delayed jobs that are due again
+PROMOTE_INTERVAL = 1.0
+
+class OutboxWorker:
+    """Consumes outbox jobs from the Redis Stream with bounded concurrency
+
+    Run standalone with `python -m src.worker` (scale by starting more
+    processes) or embedded in the web process with WORKER_EMBEDDED.
+    """
+
+    def __init__(self, outbox=None, concurrency: int = None):
+        self.settings = get_settings()
+        self.redis_handler = get_async_redis_handler()
+        self.outbox = outbox or get_tweet_outbox()
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._slots = asyncio.Semaphore(concurrency or self.settings.WORKER_CONCURRENCY)
+        self._claimed = deque()
+        self._last_claim = 0.0
+        # Where the next XAUTOCLAIM resumes scanning the pending list
+        self._claim_cursor = "0-0"
+        self._last_promote = 0.0
+        self._tasks = set()
+        self._paused_until = None
+        self._stopping = asyncio.Event()
+        self._task = None
+
+    @property
+    def visibility_timeout_ms(self) -> int:
+        return int(self.settings.OUTBOX_VISIBILITY_TIMEOUT * 1000)
+
+    async def _next_entry(self):
+        """Next (entry id, job id) to run: stale entries first, then new ones"""
+        now = asyncio.get_running_loop().time()
+        if now - self._last_promote > PROMOTE_INTERVAL:
+            self._last_promote = now
+            # Jobs whose retry delay has passed go back on the stream for any worker
+            await self.redis_handler.promote_due_outbox_jobs(time.time())
+        # A scan cut short by count carries on right away; a full one waits half the visibility timeout
+        scan_pending = self._claim_cursor != "0-0"
+        if not self._claimed and (scan_pending or now - self._last_claim > self.settings.OUTBOX_VISIBILITY_TIMEOUT / 2):
+            self._last_claim = now
+            self._claim_cursor, claimed = await self.redis_handler.claim_stale_outbox_jobs(
+                CONSUMER_GROUP, self.consumer, self.visibility_timeout_ms, count=10, start_id=self._claim_cursor
+            )
+            self._claimed.extend(claimed)
+            if self._claimed:
+                logger.warning(f"Claimed {len(self._claimed)} stale outbox jobs")
+        if self._claimed:
+            return self._claimed.popleft()
+
+        # Block for less than the socket timeout
+        entries = await self.redis_handler.read_outbox_jobs(
+            CONSUMER_GROUP, self.consumer, count=1, block_ms=2000
+        )
+        return entries[0] if entries else None
+
+    async def _run_job(self, entry_id: str, job_id: str):
+        # Runs in its own task, so this only tags this job's log lines
+        correlation_id.set(f"job:{job_id}")
+        set_task_label(f"job:{job_id}")
+        try:
+            await self.outbox.process(entry_id, job_id)
+        except RateLimited as e:
+            # Every worker posts as the same account, so stop reading until the reset
+            self._paused_until = e.reset_at
+            logger.warning(f"Worker paused: {str(e)}")
+        except Exception as e:
+            # Left unacked, so it is claimed again after the visibility timeout
+            logger.error(f"Failed to process outbox job {job_id}: {str(e)}")
+        finally:
+            self._slots.release()
+
+    async def _pause_if_rate_limited(self):
+        if self._paused_until is None:
+            return
+        delay = (self._paused_until - datetime.now(timezone.utc)).total_seconds()
+        self._paused_until = None
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        """Process jobs until stop is requested, then drain in-flight ones"""
+        await self.redis_handler.ensure_outbox_group(CONSUMER_GROUP)
+        logger.info(f"Outbox worker {self.consumer} started")
+        while not self._stopping.is_set():
+            await self._slots.acquire()
+            try:
+                await self._pause_if_rate_limited()
+                entry = None if self._stopping.is_set() else await self._next_entry()
+            except Exception as e:
+                logger.error(f"Failed to read outbox: {str(e)}")
+                entry = None
+                await asyncio.sleep(1)
+            if entry is None:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._run_job(*entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        await self._drain()
+
+    async def _drain(self):
+        if not self._tasks:
+            return
+        logger.info(f"Draining {len(self._tasks)} in-flight outbox jobs")
+        done, pending = await asyncio.wait(self._tasks, timeout=self.settings.WORKER_DRAIN_TIMEOUT)
+        for task in pending:
+            # Unacked, so another worker claims it after the visibility timeout
+            task.cancel()
+        if pending:
+            logger.warning(f"Cancelled {len(pending)} outbox jobs still running after the drain timeout")
+
+    def request_stop(self):
+        """Stop reading new jobs; run() returns once in-flight jobs finish"""
+        if not self._stopping.is_set():
+            logger.info("Outbox worker stopping")
+            self._stopping.set()
+
+    def start(self):
+        """Run the worker in the background of the current loop"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop a background worker, draining in-flight jobs"""
+        if self._task is not None:
+            self.request_stop()
+            await self._task
+            self._task = None
+
+_worker: OutboxWorker | None = None
+
+def get_outbox_worker() -> OutboxWorker:
+    """Get the process-wide outbox worker"""
+    global _worker
+    if _worker is None:
+        _worker = OutboxWorker()
+    return _worker
+
+async def main():
+    """Standalone worker entry point"""
+    settings = get_settings()
+    configure_logging(settings)
+
+    if not await get_async_redis_handler().verify_connection():
+        raise Exception("Redis connection failed")
+
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT)
+        logger.info(f"Serving worker metrics on port {settings.WORKER_METRICS_PORT}")
+
+    worker = get_outbox_worker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.request_stop)
+
+    get_token_manager().start()
+    if settings.LOOP_WATCHDOG_ENABLED:
+        get_loop_watchdog().start()
+    try:
+        await worker.run()
+    finally:
+        await get_loop_watchdog().stop()
+        await get_token_manager().stop()
+        await close_http_client()
+        await close_anthropic_client()
+        await close_async_redis()
+        logger.info("Outbox worker stopped")
+        stop_logging()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+import os
+
+# Required settings, set before anything imports src.config.settings
+os.environ.setdefault("CLIENT_ID", "test-client")
+os.environ.setdefault("CLIENT_SECRET", "test-secret")
+os.environ.setdefault("REDIRECT_URI", "http://localhost/callback")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+os.environ.setdefault("SCHEDULER_JOBSTORE", "memory")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from src.config.settings import get_settings
+from src.utils import async_redis_handler, budget_planner, rate_limiter, resilience
+import fakeredis
+import pytest
+
+@pytest.fixture
+def settings():
+    """The shared settings object; override fields with monkeypatch.setattr"""
+    return get_settings()
+
+@pytest.fixture
+def redis_handler(monkeypatch):
+    """Async Redis handler backed by an in-process fake, installed as the shared handler"""
+    handler = async_redis_handler.AsyncRedisHandler(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+    monkeypatch.setattr(async_redis_handler, "_handler", handler)
+    monkeypatch.setattr(rate_limiter, "_tracker", None)
+    monkeypatch.setattr(budget_planner, "_planner", None)
+    return handler
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
@@ -0,0 +1,30 @@
+from src.main import client_id
+from src.utils.admission import AdmissionController, Rejected
+from starlette.requests import Request
+import asyncio
+import pytest
+
+def _request(forwarded_for: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/post-tweet",
+        "headers": [(b"x-forwarded-for", forwarded_for.encode())],
+        "client": ("10.0.0.2", 4321),
+    })
+
+def test_client_is_the_address_our_proxy_appended():
+    assert client_id(_request("203.0.113.7")) == "203.0.113.7"
+    assert client_id(_request("1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+
+def test_spoofed_forwarded_for_does_not_reset_bucket(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "CLIENT_BUCKET_CAPACITY", 3)
+
+    async def main():
+        controller = AdmissionController()
+        for spoofed in range(settings.CLIENT_BUCKET_CAPACITY + 1):
+            await controller.check_client(client_id(_request(f"10.9.9.{spoofed}, 203.0.113.7")))
+
+    with pytest.raises(Rejected) as rejected:
+        asyncio.run(main())
+    assert rejected.value.status_code == 429
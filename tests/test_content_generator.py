@@ -0,0 +1,42 @@
+from benchmarks.fakes import SAMPLE_TWEETS, FakeAnthropic
+from src.bot.content_generator import CHARS_PER_TOKEN, ContentGenerator
+from src.utils import anthropic_client, usage_tracker
+from datetime import datetime, timezone
+from anthropic import AsyncAnthropic
+import asyncio
+import httpx
+import math
+import pytest
+
+@pytest.fixture
+def fake_anthropic(redis_handler, monkeypatch):
+    fake = FakeAnthropic(first_token_latency=0, token_latency=0)
+    client = AsyncAnthropic(api_key="test-key", http_client=httpx.AsyncClient(transport=fake.transport()), max_retries=0)
+    monkeypatch.setattr(anthropic_client, "_client", client)
+    monkeypatch.setattr(usage_tracker, "_tracker", None)
+    monkeypatch.setattr("benchmarks.fakes.random.choice", lambda choices: choices[0])
+    return fake
+
+async def _recorded_usage(redis_handler) -> dict:
+    return await redis_handler.get_anthropic_usage(datetime.now(timezone.utc).date().isoformat())
+
+def test_streamed_output_tokens_come_from_message_delta(fake_anthropic, redis_handler):
+    async def main():
+        tweet = await ContentGenerator()._generate_streaming("prompt")
+        return tweet, await _recorded_usage(redis_handler)
+
+    tweet, usage = asyncio.run(main())
+    assert tweet == SAMPLE_TWEETS[0]
+    assert usage["output_tokens"] == len(SAMPLE_TWEETS[0]) // fake_anthropic.chars_per_token
+    assert usage["input_tokens"] == 12
+    assert "estimated_requests" not in usage
+
+def test_stream_stopped_early_records_estimate(fake_anthropic, redis_handler):
+    async def main():
+        tweet = await ContentGenerator()._generate_streaming("prompt", limit=20)
+        return tweet, await _recorded_usage(redis_handler)
+
+    tweet, usage = asyncio.run(main())
+    assert len(tweet) > 20
+    assert usage["output_tokens"] == math.ceil(len(tweet) / CHARS_PER_TOKEN)
+    assert usage["estimated_requests"] == 1
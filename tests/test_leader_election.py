@@ -0,0 +1,37 @@
+from src.utils import leader_election
+import asyncio
+import pytest
+import time
+
+class UnreachableRedis:
+    """Renewals fail as if Redis were down"""
+
+    async def renew_leader_lease(self, worker_id: str, ttl_ms: int) -> bool:
+        raise ConnectionError("Error connecting to redis")
+
+def _leading_elector(monkeypatch, lease_left: float) -> tuple:
+    monkeypatch.setattr(leader_election, "get_async_redis_handler", lambda: UnreachableRedis())
+    elector = leader_election.LeaderElector()
+    elector.fencing_token = 7
+    elector._lease_expires_at = time.monotonic() + lease_left
+    changes = []
+
+    async def record(is_leader: bool):
+        changes.append(is_leader)
+
+    elector.add_listener(record)
+    return elector, changes
+
+def test_renewal_error_within_lease_keeps_leadership(monkeypatch):
+    elector, changes = _leading_elector(monkeypatch, lease_left=30.0)
+    with pytest.raises(ConnectionError):
+        asyncio.run(elector._tick())
+    assert elector.fencing_token == 7
+    assert changes == []
+
+def test_renewal_error_past_lease_gives_up_leadership(monkeypatch):
+    elector, changes = _leading_elector(monkeypatch, lease_left=-1.0)
+    with pytest.raises(ConnectionError):
+        asyncio.run(elector._tick())
+    assert elector.fencing_token is None
+    assert changes == [False]
@@ -0,0 +1,105 @@
+from src.bot.media_uploader import MediaUploader, MediaUploadError
+from src.utils.resilience import UpstreamError
+from src.utils import http_client
+import asyncio
+import httpx
+import pytest
+
+class FakeTokenManager:
+    async def get_valid_tokens(self) -> dict:
+        return {"access_token": "token"}
+
+class FakeMediaAPI:
+    """INIT/APPEND/FINALIZE on the X media endpoint, failing chosen APPENDs once"""
+
+    def __init__(self, fail_segments: dict = None):
+        self.fail_segments = dict(fail_segments or {})
+        self.commands = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.headers["content-type"].startswith("multipart"):
+            index = int(request.content.split(b'name="segment_index"\r\n\r\n')[1].split(b"\r\n")[0])
+            self.commands.append(f"APPEND {index}")
+            status = self.fail_segments.pop(index, 200)
+            return httpx.Response(status, json={})
+        form = dict(pair.split("=") for pair in request.content.decode().split("&"))
+        self.commands.append(form["command"])
+        return httpx.Response(200, json={"data": {"id": "media-1", "expires_after_secs": 86400}})
+
+@pytest.fixture
+def uploader(redis_handler, settings, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "MEDIA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MEDIA_CHUNK_SIZE", 4)
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 1)
+    (tmp_path / "farm.jpg").write_bytes(b"0123456789")
+    uploader = MediaUploader()
+    uploader.token_manager = FakeTokenManager()
+    return uploader
+
+def _serve(monkeypatch, api: FakeMediaAPI):
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(api.handler)))
+
+def test_interrupted_upload_resumes_missing_segments(uploader, monkeypatch):
+    api = FakeMediaAPI(fail_segments={1: 503})
+    _serve(monkeypatch, api)
+
+    async def main():
+        with pytest.raises(UpstreamError):
+            await uploader.upload("farm.jpg")
+        first = list(api.commands)
+        api.commands.clear()
+        media_id = await uploader.upload("farm.jpg")
+        return first, media_id
+
+    first, media_id = asyncio.run(main())
+    assert sorted(first) == ["APPEND 0", "APPEND 1", "APPEND 2", "INIT"]
+    assert api.commands == ["APPEND 1", "FINALIZE"]
+    assert media_id == "media-1"
+
+def test_finished_upload_is_reused(uploader, monkeypatch):
+    api = FakeMediaAPI()
+    _serve(monkeypatch, api)
+
+    async def main():
+        await uploader.upload("farm.jpg")
+        api.commands.clear()
+        return await uploader.upload("farm.jpg")
+
+    assert asyncio.run(main()) == "media-1"
+    assert api.commands == []
+
+def test_rejected_upload_starts_over(uploader, monkeypatch):
+    api = FakeMediaAPI(fail_segments={2: 400})
+    _serve(monkeypatch, api)
+
+    async def main():
+        with pytest.raises(MediaUploadError):
+            await uploader.upload("farm.jpg")
+        api.commands.clear()
+        await uploader.upload("farm.jpg")
+
+    asyncio.run(main())
+    assert api.commands[0] == "INIT"
+    assert sorted(api.commands[1:-1]) == ["APPEND 0", "APPEND 1", "APPEND 2"]
+
+def test_attachment_outside_media_dir_is_rejected(uploader):
+    with pytest.raises(ValueError):
+        uploader.resolve("../etc/passwd")
+
+def test_first_failure_cancels_other_uploads(uploader):
+    cancelled = []
+
+    async def upload(attachment: str) -> str:
+        try:
+            if attachment == "broken.mp4":
+                raise MediaUploadError("Media upload failed (400)", status_code=400)
+            await asyncio.sleep(10)
+            return attachment
+        except asyncio.CancelledError:
+            cancelled.append(attachment)
+            raise
+
+    uploader.upload = upload
+    with pytest.raises(MediaUploadError):
+        asyncio.run(uploader.upload_all(["a.jpg", "broken.mp4", "b.jpg"]))
+    assert sorted(cancelled) == ["a.jpg", "b.jpg"]
@@ -0,0 +1,118 @@
+from src.utils.outbox import CONSUMER_GROUP, FAILED, PENDING, POSTED, TweetOutbox
+from src.utils.async_redis_handler import OUTBOX_DELAYED, OUTBOX_STREAM
+from src.utils.rate_limiter import RateLimited
+from src.utils.resilience import CircuitOpenError
+from src.bot.token_manager import MissingTokensError
+from datetime import datetime, timedelta, timezone
+import asyncio
+import time
+import pytest
+
+class FakeTwitterBot:
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.posted = []
+
+    async def post_tweet(self, content: str, media_ids: list = None) -> str:
+        if self.error:
+            raise self.error
+        self.posted.append(content)
+        return "tweet-1"
+
+class FakeTweetBuffer:
+    async def pop(self) -> str:
+        return "buffered tweet"
+
+async def _deliver(redis_handler, outbox: TweetOutbox, **job) -> str:
+    """Submit a job and deliver it to process(), returning its id"""
+    await redis_handler.ensure_outbox_group(CONSUMER_GROUP)
+    job_id = (await outbox.submit(**job))['id']
+    [(entry_id, delivered_id)] = await redis_handler.read_outbox_jobs(CONSUMER_GROUP, "test", 1, 0)
+    await outbox.process(entry_id, delivered_id)
+    return job_id
+
+async def _unacked(redis_handler) -> int:
+    return (await redis_handler.redis_client.xpending(OUTBOX_STREAM, CONSUMER_GROUP))['pending']
+
+def _run(redis_handler, bot: FakeTwitterBot, **job):
+    async def main():
+        outbox = TweetOutbox(twitter_bot=bot, tweet_buffer=FakeTweetBuffer())
+        job_id = await _deliver(redis_handler, outbox, **job)
+        due_at = await redis_handler.redis_client.zscore(OUTBOX_DELAYED, job_id)
+        return await outbox.get_job(job_id), due_at, await _unacked(redis_handler)
+    return asyncio.run(main())
+
+def test_posted_job_is_acked(redis_handler):
+    bot = FakeTwitterBot()
+    job, due_at, unacked = _run(redis_handler, bot)
+
+    assert job['status'] == POSTED
+    assert job['content'] == "buffered tweet"
+    assert bot.posted == ["buffered tweet"]
+    assert due_at is None
+    assert unacked == 0
+
+def test_failed_job_is_delayed_with_backoff(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_DELAY", 30.0)
+    job, due_at, unacked = _run(redis_handler, FakeTwitterBot(error=RuntimeError("boom")), content="hello")
+
+    assert job['status'] == PENDING
+    assert job['attempts'] == "1"
+    assert job['error'] == "boom"
+    assert 15 <= due_at - time.time() <= 30
+    assert unacked == 0
+
+def test_job_fails_after_max_attempts(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 1)
+    job, due_at, unacked = _run(redis_handler, FakeTwitterBot(error=RuntimeError("boom")), content="hello")
+
+    assert job['status'] == FAILED
+    assert due_at is None
+    assert unacked == 0
+
+@pytest.mark.parametrize("error, expected_delay", [
+    (CircuitOpenError("x_api", retry_after=42.0), 42.0),
+    (MissingTokensError(), None),
+])
+def test_outage_defers_without_spending_an_attempt(redis_handler, settings, error, expected_delay):
+    job, due_at, unacked = _run(redis_handler, FakeTwitterBot(error=error), content="hello")
+
+    assert job['status'] == PENDING
+    assert job['attempts'] == "0"
+    delay = expected_delay or settings.OUTBOX_RETRY_MAX_DELAY
+    assert due_at - time.time() == pytest.approx(delay, abs=2)
+    assert unacked == 0
+
+def test_rate_limited_job_waits_for_reset(redis_handler):
+    reset_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+    bot = FakeTwitterBot(error=RateLimited(reset_at, "tweets"))
+
+    async def main():
+        outbox = TweetOutbox(twitter_bot=bot, tweet_buffer=FakeTweetBuffer())
+        with pytest.raises(RateLimited):
+            await _deliver(redis_handler, outbox, content="hello")
+        [(job_id, due_at)] = await redis_handler.redis_client.zrange(OUTBOX_DELAYED, 0, -1, withscores=True)
+        return await outbox.get_job(job_id.decode()), due_at
+
+    job, due_at = asyncio.run(main())
+    assert job['status'] == PENDING
+    assert job['attempts'] == "0"
+    assert due_at == pytest.approx(reset_at.timestamp(), abs=2)
+
+def test_job_over_daily_budget_waits_for_next_day(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "DAILY_POST_QUOTA", 1)
+    bot = FakeTwitterBot()
+
+    async def main():
+        outbox = TweetOutbox(twitter_bot=bot, tweet_buffer=FakeTweetBuffer())
+        # Posted while this job was waiting out an outage
+        await outbox.planner.record_post()
+        job_id = await _deliver(redis_handler, outbox, content="hello")
+        due_at = await redis_handler.redis_client.zscore(OUTBOX_DELAYED, job_id)
+        return await outbox.get_job(job_id), due_at, outbox.planner.next_day_start().timestamp()
+
+    job, due_at, next_day = asyncio.run(main())
+    assert bot.posted == []
+    assert job['status'] == PENDING
+    assert job['attempts'] == "0"
+    assert next_day <= due_at <= next_day + 60
@@ -0,0 +1,132 @@
+from src.utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, UpstreamError, call_with_resilience
+from src.utils import http_client, resilience
+import asyncio
+import httpx
+import pytest
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+@pytest.fixture
+def fast_retries(settings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "RETRY_MAX_DELAY", 0.001)
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30)
+    breaker.allow()
+    breaker.record_failure(ConnectionError())
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.allow()
+    breaker.record_failure(ConnectionError())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 10
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.allow()
+    assert raised.value.retry_after == pytest.approx(20)
+
+def test_half_open_allows_one_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure(ConnectionError())
+    clock[0] += 30
+
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+def test_failed_or_abandoned_probe_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=30)
+    for _ in range(3):
+        breaker.record_failure(ConnectionError())
+    clock[0] += 30
+
+    breaker.allow()
+    breaker.record_failure(ConnectionError())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+def test_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=5.0)
+    for attempt in range(6):
+        cap = min(5.0, 2 ** attempt)
+        assert all(0 <= policy.backoff(attempt) <= cap for _ in range(50))
+
+def test_transient_errors_are_retried(fast_retries):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise UpstreamError("X API error 503", status_code=503)
+        return "ok"
+
+    assert asyncio.run(call_with_resilience("test", flaky)) == "ok"
+    assert len(calls) == 3
+    assert resilience.get_breaker("test").state == CircuitBreaker.CLOSED
+
+def test_client_errors_are_not_retried(fast_retries):
+    calls = []
+
+    async def rejected():
+        calls.append(1)
+        raise UpstreamError("X API error 403", status_code=403)
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(call_with_resilience("test", rejected))
+    assert len(calls) == 1
+    assert resilience.get_breaker("test").failures == 0
+
+def _mock_x_api(monkeypatch, responses: list) -> list:
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        result = responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return httpx.Response(result)
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return requests
+
+def test_non_idempotent_post_is_not_retried_after_server_error(fast_retries, monkeypatch):
+    requests = _mock_x_api(monkeypatch, [503, 201])
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(http_client.x_api_post("https://api.x.com/2/tweets", idempotent=False, json={}))
+    assert len(requests) == 1
+
+def test_non_idempotent_post_is_retried_when_not_sent(fast_retries, monkeypatch):
+    requests = _mock_x_api(monkeypatch, [httpx.ConnectError("refused"), 201])
+
+    response = asyncio.run(http_client.x_api_post("https://api.x.com/2/tweets", idempotent=False, json={}))
+    assert response.status_code == 201
+    assert len(requests) == 2
+
+def test_has_tokens_cannot_close_half_open_redis_breaker(redis_handler, clock):
+    breaker = resilience.get_breaker("redis")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(ConnectionError())
+    clock[0] += breaker.recovery_timeout
+    # Another call is already probing Redis
+    breaker.allow()
+
+    assert asyncio.run(redis_handler.has_tokens()) is False
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,119 @@
+from src.utils import scheduler
+from apscheduler.triggers.date import DateTrigger
+from datetime import datetime, timedelta
+import threading
+import asyncio
+
+def _past_slot(tweet_scheduler, hours: int = 2):
+    tweet_scheduler.scheduler.add_job(
+        scheduler.run_scheduled_post,
+        DateTrigger(run_date=datetime.now(tweet_scheduler.tz) - timedelta(hours=hours)),
+        id="tweet_scheduler",
+        kwargs={"slot": "missed"},
+        replace_existing=True
+    )
+
+def _recording_scheduler(calls: list) -> scheduler.TweetScheduler:
+    tweet_scheduler = scheduler.TweetScheduler()
+
+    async def schedule_next(not_before=None):
+        calls.append(not_before)
+
+    tweet_scheduler._schedule_next = schedule_next
+    return tweet_scheduler
+
+def test_missed_slot_is_replanned(redis_handler):
+    calls = []
+
+    async def main():
+        tweet_scheduler = _recording_scheduler(calls)
+        await tweet_scheduler.start()
+        try:
+            _past_slot(tweet_scheduler)
+            tweet_scheduler.scheduler.resume()
+            await asyncio.sleep(0.3)
+        finally:
+            tweet_scheduler.scheduler.shutdown(wait=False)
+
+    asyncio.run(main())
+    assert calls == [None]
+
+def test_new_leader_replaces_slot_past_grace(redis_handler):
+    calls = []
+
+    async def main():
+        tweet_scheduler = _recording_scheduler(calls)
+        await tweet_scheduler.start()
+        try:
+            _past_slot(tweet_scheduler)
+            await tweet_scheduler._on_leadership_change(True)
+        finally:
+            tweet_scheduler.scheduler.shutdown(wait=False)
+
+    asyncio.run(main())
+    assert calls == [None]
+
+def test_new_leader_keeps_slot_within_grace(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MISFIRE_GRACE_TIME", 3600)
+    calls = []
+
+    async def main():
+        tweet_scheduler = _recording_scheduler(calls)
+        await tweet_scheduler.start()
+        try:
+            _past_slot(tweet_scheduler, hours=0)
+            await tweet_scheduler._on_leadership_change(True)
+            return tweet_scheduler.scheduler.get_job("tweet_scheduler")
+        finally:
+            tweet_scheduler.scheduler.shutdown(wait=False)
+
+    assert asyncio.run(main()) is not None
+    assert calls == []
+
+def test_failed_replan_schedules_in_memory_fallback(redis_handler):
+    async def main():
+        tweet_scheduler = scheduler.TweetScheduler()
+
+        async def schedule_next(not_before=None):
+            raise ConnectionError("Redis is down")
+
+        tweet_scheduler._schedule_next = schedule_next
+        await tweet_scheduler.start()
+        try:
+            await tweet_scheduler._replan_or_retry()
+            return tweet_scheduler.scheduler.get_job("tweet_scheduler_fallback", jobstore="fallback")
+        finally:
+            tweet_scheduler.scheduler.shutdown(wait=False)
+
+    job = asyncio.run(main())
+    assert job is not None
+    assert job.func is scheduler.run_fallback_replan
+
+def test_job_store_work_runs_off_the_event_loop(redis_handler):
+    store_threads, job_threads = set(), []
+
+    async def job():
+        job_threads.append(threading.current_thread())
+
+    async def main():
+        tweet_scheduler = scheduler.TweetScheduler()
+        store = tweet_scheduler.scheduler._jobstores["fallback"]
+        get_due_jobs = store.get_due_jobs
+
+        def recording_get_due_jobs(now):
+            store_threads.add(threading.current_thread())
+            return get_due_jobs(now)
+
+        store.get_due_jobs = recording_get_due_jobs
+        tweet_scheduler.scheduler.start()
+        try:
+            tweet_scheduler.scheduler.add_job(
+                job, DateTrigger(run_date=datetime.now(tweet_scheduler.tz) + timedelta(seconds=0.1)), jobstore="fallback"
+            )
+            await asyncio.sleep(0.4)
+        finally:
+            await tweet_scheduler.shutdown()
+
+    asyncio.run(main())
+    assert store_threads and threading.main_thread() not in store_threads
+    assert job_threads == [threading.main_thread()]
@@ -0,0 +1,46 @@
+from src.utils.tweet_buffer import CANNED_TWEETS, TweetBuffer
+from datetime import datetime, timezone
+import asyncio
+import pytest
+
+class FakeGenerator:
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+
+    async def generate_tweet_hedged(self) -> str:
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return "live tweet"
+
+    async def generate_batch(self, count: int) -> list:
+        return []
+
+def test_pop_prefers_buffered_draft(redis_handler):
+    async def main():
+        await redis_handler.push_tweet_drafts([
+            {"content": "buffered tweet", "created_at": datetime.now(timezone.utc).isoformat()}
+        ])
+        return await TweetBuffer(FakeGenerator()).pop()
+
+    assert asyncio.run(main()) == "buffered tweet"
+
+def test_missed_deadline_falls_back_to_unrepeated_canned_tweets(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_DEADLINE", 0.01)
+
+    async def main():
+        buffer = TweetBuffer(FakeGenerator(delay=1))
+        return [await buffer.pop() for _ in range(len(CANNED_TWEETS) * 2)]
+
+    posted = asyncio.run(main())
+    assert set(posted) <= set(CANNED_TWEETS)
+    assert set(posted[:len(CANNED_TWEETS)]) == set(CANNED_TWEETS)
+    assert all(a != b for a, b in zip(posted, posted[1:]))
+
+def test_generation_error_is_raised(redis_handler):
+    async def main():
+        return await TweetBuffer(FakeGenerator(error=ValueError("bad request"))).pop()
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
@@ -0,0 +1,60 @@
+from src.utils.outbox import CONSUMER_GROUP, POSTED, TweetOutbox
+from src.utils.async_redis_handler import OUTBOX_DELAYED
+from src.worker import OutboxWorker
+from src import worker as worker_module
+import asyncio
+
+class FlakyTwitterBot:
+    """Fails the first post, then succeeds"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def post_tweet(self, content: str, media_ids: list = None) -> str:
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("X API error 503")
+        return "tweet-1"
+
+def test_worker_redelivers_job_once_its_delay_passes(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(worker_module, "PROMOTE_INTERVAL", 0.0)
+
+    async def main():
+        outbox = TweetOutbox(twitter_bot=FlakyTwitterBot())
+        worker = OutboxWorker(outbox=outbox, concurrency=1)
+        await redis_handler.ensure_outbox_group(CONSUMER_GROUP)
+        job_id = (await outbox.submit(content="hello"))['id']
+
+        await outbox.process(*await worker._next_entry())
+        assert await redis_handler.redis_client.zscore(OUTBOX_DELAYED, job_id) is not None
+
+        # The worker moves the due job back onto the stream before reading it
+        entry = await worker._next_entry()
+        assert entry[1] == job_id
+        await outbox.process(*entry)
+        return await outbox.get_job(job_id), await redis_handler.redis_client.zcard(OUTBOX_DELAYED)
+
+    job, delayed = asyncio.run(main())
+    assert job['status'] == POSTED
+    assert job['attempts'] == "2"
+    assert delayed == 0
+
+def test_stale_claims_resume_from_the_returned_cursor(redis_handler, settings, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_VISIBILITY_TIMEOUT", 0.0)
+
+    async def main():
+        outbox = TweetOutbox(twitter_bot=FlakyTwitterBot())
+        worker = OutboxWorker(outbox=outbox, concurrency=1)
+        await redis_handler.ensure_outbox_group(CONSUMER_GROUP)
+        job_ids = [(await outbox.submit(content=f"tweet {i}"))['id'] for i in range(12)]
+        # A consumer that died holding every job
+        await redis_handler.read_outbox_jobs(CONSUMER_GROUP, "dead-worker", count=12, block_ms=0)
+
+        claimed = [(await worker._next_entry())[1] for _ in range(12)]
+        return job_ids, claimed, worker._claim_cursor
+
+    job_ids, claimed, cursor = asyncio.run(main())
+    # The second claim carries on past the first ten instead of rescanning them
+    assert claimed == job_ids
+    assert cursor == "0-0"